@@ -1,12 +1,16 @@
 import os
+import re
 import shutil
 import subprocess
 import sys
 import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 # Get script directory
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 FFMPEG_PATH = os.path.join(SCRIPT_DIR, 'ffmpeg.exe')
+FFPROBE_PATH = os.path.join(SCRIPT_DIR, 'ffprobe.exe')
 
 def download_ffmpeg():
     """Download ffmpeg.exe from official builds"""
@@ -25,44 +29,47 @@ def download_ffmpeg():
         # Download to temp file
         temp_zip = os.path.join(tempfile.gettempdir(), 'ffmpeg.zip')
         
-        # Download with progress
-        def download_progress(block_num, block_size, total_size):
-            downloaded = block_num * block_size
-            percent = min(100, int(downloaded * 100 / total_size)) if total_size > 0 else 0
-            if block_num % 100 == 0:  # Update every 100 blocks
-                print(f"    Progress: {percent}%", end='\r')
-        
-        urllib.request.urlretrieve(download_url, temp_zip, reporthook=download_progress)
+        # Download in 1MB chunks, printing progress at most twice per second
+        with urllib.request.urlopen(download_url) as response, open(temp_zip, 'wb') as f:
+            total_size = int(response.headers.get('Content-Length', 0))
+            downloaded = 0
+            last_print = 0
+            while True:
+                buf = response.read(1 << 20)
+                if not buf:
+                    break
+                f.write(buf)
+                downloaded += len(buf)
+                now = time.monotonic()
+                if total_size > 0 and now - last_print > 0.5:
+                    print(f"    Progress: {downloaded * 100 // total_size}%", end='\r')
+                    last_print = now
         print(f"    Progress: 100%")
         print(f"  - Downloaded to: {temp_zip}")
         
-        # Extract
+        # Extract only the binaries we need (inside bin folder)
         print(f"  - Extracting (this may take a moment)...")
-        extract_dir = os.path.join(tempfile.gettempdir(), 'ffmpeg_extract')
         with zipfile.ZipFile(temp_zip, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-        
-        # Find ffmpeg.exe in extracted files (inside bin folder)
-        ffmpeg_exe = None
-        for root, dirs, files in os.walk(extract_dir):
-            for file in files:
-                if file.lower() == 'ffmpeg.exe':
-                    ffmpeg_exe = os.path.join(root, file)
-                    break
-            if ffmpeg_exe:
-                break
-        
-        if not ffmpeg_exe:
-            print("  ✗ ffmpeg.exe not found in extracted archive")
-            return False
-        
-        # Copy to script directory
-        shutil.copy2(ffmpeg_exe, FFMPEG_PATH)
-        print(f"  - Copied to: {FFMPEG_PATH}")
+            members = {}
+            for name in zip_ref.namelist():
+                lower_name = name.lower()
+                if lower_name.endswith('/bin/ffmpeg.exe'):
+                    members[FFMPEG_PATH] = name
+                elif lower_name.endswith('/bin/ffprobe.exe'):
+                    # ffprobe is used to skip already-compressed files
+                    members[FFPROBE_PATH] = name
+            
+            if FFMPEG_PATH not in members:
+                print("  ✗ ffmpeg.exe not found in downloaded archive")
+                return False
+            
+            for target_path, member in members.items():
+                with zip_ref.open(member) as src, open(target_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                print(f"  - Extracted to: {target_path}")
         
         # Cleanup
         os.remove(temp_zip)
-        shutil.rmtree(extract_dir, ignore_errors=True)
         print(f"  - Cleaned up temporary files")
         
         # Verify
@@ -115,11 +122,27 @@ def check_and_install_ffmpeg():
 
 HAS_FFMPEG = has_ffmpeg()
 
-def get_ffmpeg_cmd():
-    """Get ffmpeg command path"""
-    if os.path.exists(FFMPEG_PATH):
-        return FFMPEG_PATH
-    return 'ffmpeg'
+# Resolved ffmpeg/ffprobe commands (local copy in script directory, else system PATH)
+FFMPEG_CMD = FFMPEG_PATH if os.path.exists(FFMPEG_PATH) else 'ffmpeg'
+FFPROBE_CMD = FFPROBE_PATH if os.path.exists(FFPROBE_PATH) else 'ffprobe'
+
+def probe_bitrate_kbps(audio_path):
+    """Get audio stream bitrate in kbps via ffprobe (None if unavailable)"""
+    try:
+        cmd = [
+            FFPROBE_CMD,
+            '-v', 'error',
+            '-select_streams', 'a:0',
+            '-show_entries', 'stream=bit_rate',
+            '-of', 'csv=p=0',
+            audio_path
+        ]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        if result.returncode != 0:
+            return None
+        return int(result.stdout.strip()) / 1000
+    except (OSError, ValueError):
+        return None
 
 # Get project root directory
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -130,6 +153,15 @@ target_dir = os.path.join(base_dir, 'game', 'audio')
 # Supported audio formats
 supported_formats = ('.mp3', '.ogg', '.wav', '.flac', '.m4a', '.aac')
 
+# Name prefix of encode temp files, leftovers of an interrupted run are removed by the next scan
+TEMP_PREFIX = 'vita_tmp_'
+# Exact shape of NamedTemporaryFile(prefix=TEMP_PREFIX, suffix=output_ext) names
+# (8 random name characters), so a game asset that merely shares the prefix is kept
+TEMP_NAME_PATTERN = re.compile(re.escape(TEMP_PREFIX) + r'[a-z0-9_]{8}\.(?:mp3|ogg)')
+
+# Max files encoded by a single ffmpeg invocation
+FFMPEG_BATCH_SIZE = 32
+
 # Compression config (PS Vita optimization)
 AUDIO_CONFIG = {
     # BGM (background music) - larger files, use medium quality
@@ -137,29 +169,37 @@ AUDIO_CONFIG = {
         'max_size_mb': 1.0,  # >1MB considered BGM
         'mp3_bitrate': '64k',  # 64kbps, suitable for PS Vita
         'ogg_quality': 3,  # OGG quality 0-10, 3 is good balance
+        'ogg_kbps': 112,  # Nominal Vorbis bitrate at ogg_quality
     },
     # SFX (sound effects) - small files, maintain quality
     'sfx': {
         'max_size_mb': 0.1,  # <100KB considered SFX
+        'min_size_mb': 0.05,  # <50KB not worth re-encoding
         'mp3_bitrate': '96k',
         'ogg_quality': 5,
+        'ogg_kbps': 160,
     },
     # Voice - medium quality
     'voice': {
         'folder': 'voice',
         'mp3_bitrate': '80k',
         'ogg_quality': 4,
+        'ogg_kbps': 128,
     }
 }
 
+# Flattened per-type settings, used in the per-file path
+MP3_BITRATE = {t: c['mp3_bitrate'] for t, c in AUDIO_CONFIG.items()}
+MP3_KBPS = {t: int(b.rstrip('k')) for t, b in MP3_BITRATE.items()}
+OGG_QUALITY = {t: c['ogg_quality'] for t, c in AUDIO_CONFIG.items()}
+OGG_KBPS = {t: c['ogg_kbps'] for t, c in AUDIO_CONFIG.items()}
+
 def get_file_size_mb(file_path):
     """Get file size in MB"""
     return os.path.getsize(file_path) / (1024 * 1024)
 
-def get_audio_type(file_path, relative_path):
+def get_audio_type(size_mb, relative_path):
     """Determine audio type"""
-    size_mb = get_file_size_mb(file_path)
-    
     # Check if in voice folder
     if AUDIO_CONFIG['voice']['folder'] in relative_path.lower():
         return 'voice'
@@ -172,25 +212,44 @@ def get_audio_type(file_path, relative_path):
     else:
         return 'bgm'  # Default to BGM
 
+def mp3_output_args(audio_type):
+    """Get ffmpeg output options for MP3"""
+    return [
+        '-codec:a', 'libmp3lame',
+        '-b:a', MP3_BITRATE[audio_type],
+        '-ac', '2',  # Stereo
+        '-ar', '44100',  # Sample rate
+    ]
+
+def ogg_output_args(audio_type):
+    """Get ffmpeg output options for OGG"""
+    return [
+        '-codec:a', 'libvorbis',
+        '-q:a', str(OGG_QUALITY[audio_type]),  # VBR quality
+        '-ac', '2',
+        '-ar', '44100',
+    ]
+
+def run_ffmpeg(input_path, output_path, output_args):
+    """Encode a single file with ffmpeg"""
+    cmd = [
+        FFMPEG_CMD,
+        '-hide_banner', '-loglevel', 'error',
+        '-i', input_path,
+        *output_args,
+        '-y',  # Overwrite output file
+        output_path
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0 and os.path.exists(output_path)
+
 def compress_mp3(input_path, output_path, audio_type='bgm'):
     """Compress MP3 using ffmpeg"""
     if not HAS_FFMPEG:
         return False
     
     try:
-        bitrate = AUDIO_CONFIG[audio_type]['mp3_bitrate']
-        cmd = [
-            get_ffmpeg_cmd(),
-            '-i', input_path,
-            '-codec:a', 'libmp3lame',
-            '-b:a', bitrate,
-            '-ac', '2',  # Stereo
-            '-ar', '44100',  # Sample rate
-            '-y',  # Overwrite output file
-            output_path
-        ]
-        result = subprocess.run(cmd, capture_output=True)
-        return result.returncode == 0 and os.path.exists(output_path)
+        return run_ffmpeg(input_path, output_path, mp3_output_args(audio_type))
     except Exception as e:
         print(f"  MP3 compression error: {e}")
         return False
@@ -201,19 +260,7 @@ def compress_ogg(input_path, output_path, audio_type='bgm'):
         return False
     
     try:
-        quality = AUDIO_CONFIG[audio_type]['ogg_quality']
-        cmd = [
-            get_ffmpeg_cmd(),
-            '-i', input_path,
-            '-codec:a', 'libvorbis',
-            '-q:a', str(quality),  # VBR quality
-            '-ac', '2',
-            '-ar', '44100',
-            '-y',
-            output_path
-        ]
-        result = subprocess.run(cmd, capture_output=True)
-        return result.returncode == 0 and os.path.exists(output_path)
+        return run_ffmpeg(input_path, output_path, ogg_output_args(audio_type))
     except Exception as e:
         print(f"  OGG compression error: {e}")
         return False
@@ -224,98 +271,199 @@ def compress_wav_to_ogg(input_path, output_path, audio_type='bgm'):
         return False
     
     try:
-        quality = AUDIO_CONFIG[audio_type]['ogg_quality']
+        return run_ffmpeg(input_path, output_path, ogg_output_args(audio_type))
+    except Exception as e:
+        print(f"  WAV conversion error: {e}")
+        return False
+
+def compress_batch(jobs):
+    """Encode several prepared files with a single ffmpeg invocation"""
+    if not HAS_FFMPEG:
+        return False
+    
+    try:
         cmd = [
-            get_ffmpeg_cmd(),
-            '-i', input_path,
-            '-codec:a', 'libvorbis',
-            '-q:a', str(quality),
-            '-ac', '2',
-            '-ar', '44100',
+            FFMPEG_CMD,
+            '-hide_banner', '-loglevel', 'error',
             '-y',
-            output_path
         ]
-        result = subprocess.run(cmd, capture_output=True)
-        return result.returncode == 0 and os.path.exists(output_path)
+        for job in jobs:
+            cmd += ['-i', job['audio_path']]
+        # Each output maps the audio stream of its own input and has its own codec options
+        for index, job in enumerate(jobs):
+            cmd += ['-map', f'{index}:a:0', *job['output_args'], job['temp_path']]
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return result.returncode == 0 and all(os.path.exists(job['temp_path']) for job in jobs)
     except Exception as e:
-        print(f"  WAV conversion error: {e}")
+        print(f"  Batch compression error: {e}")
         return False
 
-def optimize_audio(audio_path):
-    """Optimize audio file"""
-    try:
-        rel_path = os.path.relpath(audio_path, base_dir)
+def prepare_audio(audio_path, original_size_bytes=None):
+    """Decide how to encode a file, returns (job, None) or (None, result) if skipped"""
+    rel_path = os.path.relpath(audio_path, base_dir)
+    if original_size_bytes is None:
         original_size_mb = get_file_size_mb(audio_path)
-        file_ext = os.path.splitext(audio_path)[1].lower()
-        audio_type = get_audio_type(audio_path, rel_path)
+    else:
+        original_size_mb = original_size_bytes / (1024 * 1024)
+    file_ext = os.path.splitext(audio_path)[1].lower()
+    audio_type = get_audio_type(original_size_mb, rel_path)
+    
+    # Skip tiny SFX, ffmpeg startup costs more than re-encoding could save
+    if file_ext in ('.mp3', '.ogg') and original_size_mb < AUDIO_CONFIG['sfx']['min_size_mb']:
+        return None, (False, f"Skipped (tiny SFX): {rel_path} ({original_size_mb:.2f}MB)", 0.0)
+    
+    bitrate = MP3_BITRATE[audio_type]
+    quality = OGG_QUALITY[audio_type]
+    
+    # Skip re-encoding when the source is already at or below target bitrate
+    if file_ext in ('.mp3', '.ogg'):
+        if file_ext == '.mp3':
+            target_kbps = MP3_KBPS[audio_type]
+        else:
+            target_kbps = OGG_KBPS[audio_type]
+        input_kbps = probe_bitrate_kbps(audio_path)
+        if input_kbps is not None and input_kbps <= target_kbps * 1.05:
+            return None, (False, f"Skipped (already optimized): {rel_path} ({input_kbps:.0f}kbps)", 0.0)
+    
+    if file_ext == '.mp3':
+        output_ext = '.mp3'
+        output_args = mp3_output_args(audio_type)
+        mode = f"MP3 {bitrate}"
+    elif file_ext == '.ogg':
+        output_ext = '.ogg'
+        output_args = ogg_output_args(audio_type)
+        mode = f"OGG q{quality}"
+    elif file_ext == '.wav':
+        # WAV to OGG
+        output_ext = '.ogg'
+        output_args = ogg_output_args(audio_type)
+        mode = f"WAV→OGG q{quality}"
+    else:
+        # Other formats to OGG
+        output_ext = '.ogg'
+        output_args = ogg_output_args(audio_type)
+        mode = f"→OGG q{quality}"
+    
+    # Create temp file next to the original so the final move is a cheap rename
+    # (keep the real extension last so ffmpeg can pick the output format)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(audio_path), prefix=TEMP_PREFIX, suffix=output_ext, delete=False) as tmp:
+        temp_path = tmp.name
+    
+    job = {
+        'audio_path': audio_path,
+        'rel_path': rel_path,
+        'original_size_mb': original_size_mb,
+        'file_ext': file_ext,
+        'audio_type': audio_type,
+        'output_args': output_args,
+        'mode': mode,
+        'temp_path': temp_path,
+    }
+    return job, None
+
+def encode_audio(job):
+    """Encode a prepared file on its own"""
+    file_ext = job['file_ext']
+    if file_ext == '.mp3':
+        return compress_mp3(job['audio_path'], job['temp_path'], job['audio_type'])
+    elif file_ext == '.ogg':
+        return compress_ogg(job['audio_path'], job['temp_path'], job['audio_type'])
+    else:
+        return compress_wav_to_ogg(job['audio_path'], job['temp_path'], job['audio_type'])
+
+def finalize_audio(job, success):
+    """Replace the original with the encoded temp file, returns (success, message, saved_mb)"""
+    audio_path = job['audio_path']
+    rel_path = job['rel_path']
+    original_size_mb = job['original_size_mb']
+    file_ext = job['file_ext']
+    temp_path = job['temp_path']
+    mode = job['mode']
+    
+    try:
+        if not success:
+            os.remove(temp_path)
+            return False, f"Compression failed: {rel_path}", 0.0
         
-        # Create temp file
-        with tempfile.NamedTemporaryFile(suffix=file_ext, delete=False) as tmp:
-            temp_path = tmp.name
+        # Check compressed size
+        new_size_mb = get_file_size_mb(temp_path)
+        saved_mb = original_size_mb - new_size_mb
         
-        try:
-            success = False
-            mode = ""
-            
-            if file_ext == '.mp3':
-                success = compress_mp3(audio_path, temp_path, audio_type)
-                mode = f"MP3 {AUDIO_CONFIG[audio_type]['mp3_bitrate']}"
-            elif file_ext == '.ogg':
-                success = compress_ogg(audio_path, temp_path, audio_type)
-                mode = f"OGG q{AUDIO_CONFIG[audio_type]['ogg_quality']}"
-            elif file_ext == '.wav':
-                # WAV to OGG
-                ogg_path = temp_path.replace('.wav', '.ogg')
-                success = compress_wav_to_ogg(audio_path, ogg_path, audio_type)
-                if success:
-                    temp_path = ogg_path
-                    mode = f"WAV→OGG q{AUDIO_CONFIG[audio_type]['ogg_quality']}"
-            else:
-                # Other formats to OGG
-                ogg_path = temp_path.replace(file_ext, '.ogg')
-                success = compress_wav_to_ogg(audio_path, ogg_path, audio_type)
-                if success:
-                    temp_path = ogg_path
-                    mode = f"→OGG q{AUDIO_CONFIG[audio_type]['ogg_quality']}"
-            
-            if not success:
-                os.remove(temp_path)
-                return False, f"Compression failed: {rel_path}"
-            
-            # Check compressed size
-            new_size_mb = get_file_size_mb(temp_path)
-            saved_mb = original_size_mb - new_size_mb
-            
-            # If file got larger and not format conversion, keep original
-            if saved_mb < -0.01 and file_ext in ('.mp3', '.ogg'):
-                os.remove(temp_path)
-                return False, f"Skipped (compression increased size): {rel_path} ({original_size_mb:.2f}MB)"
+        # If file got larger and not format conversion, keep original
+        if saved_mb < -0.01 and file_ext in ('.mp3', '.ogg'):
+            os.remove(temp_path)
+            return False, f"Skipped (compression increased size): {rel_path} ({original_size_mb:.2f}MB)", 0.0
+        
+        # Determine output path (if format converted, need to change extension)
+        if file_ext not in ('.mp3', '.ogg'):
+            new_path = audio_path.replace(file_ext, '.ogg')
+            # Need to update code references, here only handle file
+            shutil.move(temp_path, new_path)
+            # Delete original file
+            os.remove(audio_path)
+            return True, f"Converted: {rel_path} → {os.path.basename(new_path)} ({original_size_mb:.2f}MB → {new_size_mb:.2f}MB, saved {saved_mb:.2f}MB) [{mode}]", saved_mb
+        else:
+            # Replace original file
+            shutil.move(temp_path, audio_path)
             
-            # Determine output path (if format converted, need to change extension)
-            if file_ext not in ('.mp3', '.ogg') and success:
-                new_path = audio_path.replace(file_ext, '.ogg')
-                # Need to update code references, here only handle file
-                shutil.move(temp_path, new_path)
-                # Delete original file
-                os.remove(audio_path)
-                return True, f"Converted: {rel_path} → {os.path.basename(new_path)} ({original_size_mb:.2f}MB → {new_size_mb:.2f}MB, saved {saved_mb:.2f}MB) [{mode}]"
-            else:
-                # Replace original file
-                shutil.move(temp_path, audio_path)
-                
-            if saved_mb > 0.001:
-                return True, f"Compressed: {rel_path} ({original_size_mb:.2f}MB → {new_size_mb:.2f}MB, saved {saved_mb:.2f}MB) [{mode}]"
-            else:
-                return True, f"Processed: {rel_path} ({original_size_mb:.2f}MB) [{mode}]"
-                
-        except Exception as e:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            raise
+        if saved_mb > 0.001:
+            return True, f"Compressed: {rel_path} ({original_size_mb:.2f}MB → {new_size_mb:.2f}MB, saved {saved_mb:.2f}MB) [{mode}]", saved_mb
+        else:
+            return True, f"Processed: {rel_path} ({original_size_mb:.2f}MB) [{mode}]", 0.0
             
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False, f"Error processing {rel_path}: {str(e)}", 0.0
+
+def optimize_audio(audio_path, original_size_bytes=None):
+    """Optimize audio file, returns (success, message, saved_mb)"""
+    try:
+        job, result = prepare_audio(audio_path, original_size_bytes)
     except Exception as e:
         rel_path = os.path.relpath(audio_path, base_dir)
-        return False, f"Error processing {rel_path}: {str(e)}"
+        return False, f"Error processing {rel_path}: {str(e)}", 0.0
+    if result is not None:
+        return result
+    return finalize_audio(job, encode_audio(job))
+
+def optimize_audio_batch(batch):
+    """Optimize a batch of (path, size_bytes) with one ffmpeg invocation, returns list of results"""
+    results = []
+    jobs = []
+    for audio_path, size_bytes in batch:
+        try:
+            job, result = prepare_audio(audio_path, size_bytes)
+        except Exception as e:
+            rel_path = os.path.relpath(audio_path, base_dir)
+            results.append((False, f"Error processing {rel_path}: {str(e)}", 0.0))
+            continue
+        if result is not None:
+            results.append(result)
+        else:
+            jobs.append(job)
+    
+    if len(jobs) > 1 and compress_batch(jobs):
+        results.extend(finalize_audio(job, True) for job in jobs)
+    else:
+        # Single file, or one bad input failed the whole batch: encode files one by one
+        results.extend(finalize_audio(job, encode_audio(job)) for job in jobs)
+    return results
+
+def scan_audio_files(directory):
+    """Recursively yield (path, size_bytes) of supported audio files, reusing scandir stats"""
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_audio_files(entry.path)
+            elif TEMP_NAME_PATTERN.fullmatch(entry.name):
+                # Temp file of a crashed run, must not be encoded or shipped with the game
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            elif entry.name.lower().endswith(supported_formats):
+                yield entry.path, entry.stat().st_size
 
 def process_directory(directory):
     """Recursively process all audio in directory"""
@@ -325,25 +473,22 @@ def process_directory(directory):
     total_saved_mb = 0
     total_increased_mb = 0
     
-    for root, dirs, files in os.walk(directory):
-        for filename in files:
-            if filename.lower().endswith(supported_formats):
-                audio_path = os.path.join(root, filename)
-                success, message = optimize_audio(audio_path)
+    # Collect files first, then encode them in parallel batches (one ffmpeg per batch)
+    audio_files = list(scan_audio_files(directory))
+    max_workers = os.cpu_count() or 1
+    # Keep every worker busy on small trees, cap process count savings at FFMPEG_BATCH_SIZE
+    batch_size = max(1, min(FFMPEG_BATCH_SIZE, -(-len(audio_files) // max_workers)))
+    batches = [audio_files[i:i + batch_size] for i in range(0, len(audio_files), batch_size)]
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for results in executor.map(optimize_audio_batch, batches):
+            for success, message, saved_mb in results:
                 print(message)
                 
                 if success:
                     processed_count += 1
-                    if "saved" in message:
-                        try:
-                            saved_str = message.split("saved ")[1].split("MB")[0]
-                            saved_val = float(saved_str)
-                            if saved_val > 0:
-                                total_saved_mb += saved_val
-                            else:
-                                total_increased_mb += abs(saved_val)
-                        except:
-                            pass
+                    total_saved_mb += max(0, saved_mb)
+                    total_increased_mb += max(0, -saved_mb)
                 elif "Skipped" in message:
                     skipped_count += 1
                 elif "Error" in message or "failed" in message:
@@ -352,7 +497,7 @@ def process_directory(directory):
     return processed_count, skipped_count, error_count, total_saved_mb, total_increased_mb
 
 def main():
-    global HAS_FFMPEG
+    global HAS_FFMPEG, FFMPEG_CMD, FFPROBE_CMD
     
     print("=" * 70)
     print("PS Vita Audio Optimization Tool")
@@ -362,10 +507,12 @@ def main():
     if not HAS_FFMPEG:
         if check_and_install_ffmpeg():
             HAS_FFMPEG = True
+            FFMPEG_CMD = FFMPEG_PATH if os.path.exists(FFMPEG_PATH) else 'ffmpeg'
+            FFPROBE_CMD = FFPROBE_PATH if os.path.exists(FFPROBE_PATH) else 'ffprobe'
     
     if HAS_FFMPEG:
         # Show which ffmpeg is being used
-        if os.path.exists(FFMPEG_PATH):
+        if FFMPEG_CMD == FFMPEG_PATH:
             print("✓ ffmpeg enabled (using local: scripts_for_vita/ffmpeg.exe)")
         else:
             print("✓ ffmpeg enabled (using system PATH)")
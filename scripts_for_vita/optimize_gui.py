@@ -1,6 +1,8 @@
+import functools
 import os
 import re
 import shutil
+import sys
 
 # Get parent directory of script directory (project root)
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -10,6 +12,9 @@ screens_path = os.path.join(base_dir, 'game', 'screens.rpy')
 # Scale ratio (960 / 1280 = 0.75)
 SCALE_RATIO = 0.75
 
+# File I/O buffer size (1MB instead of the 8KB default)
+IO_BUFFER_SIZE = 1 << 20
+
 # Config items that need fixed ratio scaling (current value -> calculate new value by ratio)
 gui_numeric_configs = [
     # (config_name, should_scale)
@@ -89,27 +94,80 @@ screens_numeric_configs = [
     ('right_margin 20', True),
 ]
 
-def add_scroll_to_say_screen(file_path):
-    """Add scrolling to say screen"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def _normalize_configs(configs):
+    """Expand (name, should_scale[, transform]) entries to (name, should_scale, transform)"""
+    return [(config[0], config[1], config[2] if len(config) > 2 else None) for config in configs]
+
+def _config_regex(config_name, is_screens, ws):
+    """Regex source of a numeric config with groups (prefix, value), ws is the whitespace class"""
+    if is_screens:
+        # screens.rpy: keyword value, matched on the keyword alone
+        return rf'({re.escape(config_name.rsplit()[0])}{ws}+)(\d+)'
+    # gui.rpy: config_name = value
+    return rf'({re.escape(config_name)}{ws}*={ws}*)(\d+)'
+
+def _borders_regex(config_name, ws):
+    """Regex source of config_name = Borders(left, top, right, bottom) with groups (prefix, l, t, r, b, suffix)"""
+    return rf'({re.escape(config_name)}{ws}*={ws}*Borders\()(\d+),{ws}*(\d+),{ws}*(\d+),{ws}*(\d+)(\))'
+
+# gui.rpy: base resolution
+_GUI_INIT = 'gui.init(1280, 720)'
+
+@functools.lru_cache(maxsize=None)
+def _build_config_pattern(configs, is_screens=False):
+    """Build the regexes of a config list, returns (pattern, rules, borders_rules)
     
+    pattern combines every config into one alternation, it only locates the lines to rewrite.
+    rules is [(config_name, regex, transform)] in config order with the transform memoized,
+    borders_rules is [(config_name, regex)] (gui.rpy only); per line the first rule that
+    matches is applied, like the old line-by-line search.
+    """
+    # Whitespace other than newline: a combined match stays on one line, where it
+    # accepts the same text as \s in the per-line regexes
+    line_ws = r'[^\S\n]'
+    branches = []
+    rules = []
+    seen = set()
+    for config_name, _, transform in _normalize_configs(configs):
+        source = _config_regex(config_name, is_screens, r'\s')
+        # Configs sharing a keyword (e.g. 'xsize 280' and 'xsize 920') need one branch only
+        if source not in seen:
+            seen.add(source)
+            branches.append(_config_regex(config_name, is_screens, line_ws))
+        # Same old value always gives same new value, memoize per transform
+        if transform:
+            transform = functools.lru_cache(maxsize=4096)(transform)
+        rules.append((config_name, re.compile(source), transform))
+    borders_rules = []
+    if not is_screens:
+        for config_name in gui_borders_configs:
+            branches.append(_borders_regex(config_name, line_ws))
+            borders_rules.append((config_name, re.compile(_borders_regex(config_name, r'\s'))))
+    return re.compile('|'.join(branches)), rules, borders_rules
+
+# Build the patterns for the built-in config lists at import
+_build_config_pattern(tuple(gui_numeric_configs), False)
+_build_config_pattern(tuple(screens_numeric_configs), True)
+
+def add_scroll_to_say_screen(content):
+    """Add scrolling to say screen, returns (new_content, modified_count)"""
     # Check if scrolling already added
     if '# PS Vita: Add viewport for long text scrolling' in content:
         print("  say screen scroll already added, skipping")
-        return 0
+        return content, 0
     
     # Find screen say definition (format should match actual file)
     old_text = 'text what id "what"'
+    offset = content.find(old_text)
     
-    if old_text not in content:
+    if offset == -1:
         print("  say screen text area not found")
-        return 0
+        return content, 0
     
     # Check if viewport already added
     if 'id "dialogue_viewport"' in content:
         print("  say screen scroll already added, skipping")
-        return 0
+        return content, 0
     
     # Use two viewports for cases with/without side image, scale margins by ratio
     # Also override say_dialogue style xsize limit
@@ -143,13 +201,11 @@ def add_scroll_to_say_screen(file_path):
                 text what id "what":
                     xsize None  # Override say_dialogue style xsize limit'''
     
-    content = content.replace(old_text, new_text, 1)  # Only replace first occurrence
-    
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    # Only replace first occurrence, splice at its offset instead of rescanning with replace
+    content = content[:offset] + new_text + content[offset + len(old_text):]
     
     print("  Added viewport scroll support to say screen")
-    return 1
+    return content, 1
 
 def backup_file(file_path):
     """Create backup file"""
@@ -162,147 +218,130 @@ def backup_file(file_path):
         print(f"Backup already exists: {backup_path}")
         return False
 
-def restore_backup(file_path):
-    """Restore file from backup"""
-    backup_path = file_path + '.backup'
-    if os.path.exists(backup_path):
-        shutil.copy2(backup_path, file_path)
-        print(f"Restored from backup: {file_path}")
-        return True
-    return False
-
+@functools.lru_cache(maxsize=4096)
 def scale_value(value, ratio=SCALE_RATIO):
     """Scale value by ratio"""
     return max(1, int(value * ratio))
 
-def process_config_line(line, config_name, transform=None):
-    """Process single line config, return new value or None"""
-    # Match pattern: config_name = value
-    pattern = rf'({re.escape(config_name)}\s*=\s*)(\d+)'
-    match = re.search(pattern, line)
-    if match:
-        prefix = match.group(1)
-        old_value = int(match.group(2))
-        
-        if transform:
-            new_value = transform(old_value)
-        else:
-            new_value = scale_value(old_value)
-        
-        return line.replace(f'{prefix}{old_value}', f'{prefix}{new_value}'), old_value, new_value
-    return None, None, None
+def process_config_match(match, transform=None):
+    """Process numeric config match, return (old_text, new_text, old_value, new_value)"""
+    prefix = match.group(1)
+    old_value = int(match.group(2))
+    
+    if transform:
+        new_value = transform(old_value)
+    else:
+        new_value = scale_value(old_value)
+    
+    return f'{prefix}{old_value}', f'{prefix}{new_value}', old_value, new_value
 
-def process_borders_line(line, config_name):
-    """Process Borders config, return new value or None"""
-    # Match pattern: config_name = Borders(left, top, right, bottom)
-    pattern = rf'({re.escape(config_name)}\s*=\s*Borders\()(\d+),\s*(\d+),\s*(\d+),\s*(\d+)(\))'
-    match = re.search(pattern, line)
-    if match:
-        prefix = match.group(1)
-        left = int(match.group(2))
-        top = int(match.group(3))
-        right = int(match.group(4))
-        bottom = int(match.group(5))
-        suffix = match.group(6)
-        
-        new_left = scale_value(left)
-        new_top = scale_value(top)
-        new_right = scale_value(right)
-        new_bottom = scale_value(bottom)
-        
-        old_str = f'{prefix}{left}, {top}, {right}, {bottom}{suffix}'
-        new_str = f'{prefix}{new_left}, {new_top}, {new_right}, {new_bottom}{suffix}'
-        
-        return line.replace(old_str, new_str), (left, top, right, bottom), (new_left, new_top, new_right, new_bottom)
-    return None, None, None
+def process_borders_match(match):
+    """Process Borders config match, return (old_text, new_text, old_values, new_values)"""
+    prefix = match.group(1)
+    left = int(match.group(2))
+    top = int(match.group(3))
+    right = int(match.group(4))
+    bottom = int(match.group(5))
+    suffix = match.group(6)
+    
+    new_left = scale_value(left)
+    new_top = scale_value(top)
+    new_right = scale_value(right)
+    new_bottom = scale_value(bottom)
+    
+    old_str = f'{prefix}{left}, {top}, {right}, {bottom}{suffix}'
+    new_str = f'{prefix}{new_left}, {new_top}, {new_right}, {new_bottom}{suffix}'
+    
+    return old_str, new_str, (left, top, right, bottom), (new_left, new_top, new_right, new_bottom)
 
-def process_screens_line(line, config_pattern, transform=None):
-    """Process style configs in screens.rpy"""
-    # Match pattern: keyword value
-    pattern = rf'({re.escape(config_pattern.rsplit()[0])}\s+)(\d+)'
-    match = re.search(pattern, line)
-    if match:
-        prefix = match.group(1)
-        old_value = int(match.group(2))
-        
-        if transform:
-            new_value = transform(old_value)
-        else:
-            new_value = scale_value(old_value)
-        
-        return line.replace(f'{prefix}{old_value}', f'{prefix}{new_value}'), old_value, new_value
-    return None, None, None
+def process_line(line, rules, borders_rules, msgs):
+    """Rewrite the first config found on line (numeric configs first, then Borders), returns new line"""
+    for config_name, regex, transform in rules:
+        match = regex.search(line)
+        if match:
+            old_str, new_str, old_val, new_val = process_config_match(match, transform)
+            msgs.append(f"  {config_name}: {old_val} -> {new_val}\n")
+            return line.replace(old_str, new_str)
+    for config_name, regex in borders_rules:
+        match = regex.search(line)
+        if match:
+            old_str, new_str, old_vals, new_vals = process_borders_match(match)
+            msgs.append(f"  {config_name}: Borders{old_vals} -> Borders{new_vals}\n")
+            return line.replace(old_str, new_str)
+    return line
 
-def optimize_file(file_path, configs, is_screens=False, auto_restore=True):
-    """Optimize single file"""
+def load_file(file_path, auto_restore=True):
+    """Create backup and read source text, returns (source_path, content) or (None, None)"""
     if not os.path.exists(file_path):
         print(f"Error: File does not exist: {file_path}")
-        return -1  # Return -1 to indicate error
+        return None, None
     
-    # Restore from backup if exists
+    # Start from backup if exists (read it directly instead of copying it over the file first)
     backup_path = file_path + '.backup'
     if auto_restore and os.path.exists(backup_path):
-        restore_backup(file_path)
+        source_path = backup_path
+        print(f"Restoring from backup: {backup_path}")
+    else:
+        source_path = file_path
     
     # Create backup if not exists
     backup_file(file_path)
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    modified_count = 0
-    new_lines = []
+    with open(source_path, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+        content = f.read()
+    return source_path, content
+
+def save_file(file_path, source_path, original_content, content):
+    """Write content only if it differs from what is on disk"""
+    # An idempotent re-run from backup leaves the file untouched
+    if source_path == file_path:
+        current_content = original_content
+    else:
+        with open(file_path, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+            current_content = f.read()
+    if content != current_content:
+        with open(file_path, 'w', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+            f.write(content)
+
+def apply_configs(content, configs, is_screens=False):
+    """Scale all configs in content, returns (new_content, modified_count)"""
+    pattern, rules, borders_rules = _build_config_pattern(tuple(configs), is_screens)
+    # One log line per modified config, written in one go after the pass
+    msgs = []
     
-    for line in lines:
-        new_line = line
-        modified = False
-        
-        # First try to process normal numeric configs
-        for config in configs:
-            if len(config) == 2:
-                config_name, should_scale = config
-                transform = None
-            else:
-                config_name, should_scale, transform = config
-            
-            if is_screens:
-                result, old_val, new_val = process_screens_line(new_line, config_name, transform)
-            else:
-                result, old_val, new_val = process_config_line(new_line, config_name, transform)
-            
-            if result:
-                new_line = result
-                print(f"  {config_name}: {old_val} -> {new_val}")
-                modified_count += 1
-                modified = True
-                break  # Only match one config per line
-        
-        # Then process Borders configs (gui.rpy only)
-        if not modified and not is_screens:
-            for borders_name in gui_borders_configs:
-                result, old_vals, new_vals = process_borders_line(new_line, borders_name)
-                if result:
-                    new_line = result
-                    print(f"  {borders_name}: Borders{old_vals} -> Borders{new_vals}")
-                    modified_count += 1
-                    modified = True
-                    break
-        
-        new_lines.append(new_line)
+    # The combined pattern finds the lines holding a config in one pass over the file,
+    # only those lines are rewritten (one config per line, the first in config order)
+    pieces = []
+    pos = 0
+    for match in pattern.finditer(content):
+        start = content.rfind('\n', 0, match.start()) + 1
+        if start < pos:
+            # Another config on a line that was already rewritten
+            continue
+        end = content.find('\n', match.end())
+        end = len(content) if end == -1 else end + 1
+        pieces.append(content[pos:start])
+        pieces.append(process_line(content[start:end], rules, borders_rules, msgs))
+        pos = end
+    pieces.append(content[pos:])
+    content = ''.join(pieces)
     
     # Special handling: modify gui.init
-    if not is_screens:
-        content = ''.join(new_lines)
-        if 'gui.init(1280, 720)' in content:
-            content = content.replace('gui.init(1280, 720)', 'gui.init(960, 544)')
-            print(f"  gui.init: 1280, 720 -> 960, 544")
-            modified_count += 1
-            new_lines = content.split('\n')
-            new_lines = [line + '\n' for line in new_lines[:-1]] + [new_lines[-1]]
+    if not is_screens and _GUI_INIT in content:
+        content = content.replace(_GUI_INIT, 'gui.init(960, 544)')
+        msgs.append(f"  gui.init: 1280, 720 -> 960, 544\n")
     
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.writelines(new_lines)
+    sys.stdout.writelines(msgs)
+    return content, len(msgs)
+
+def optimize_file(file_path, configs, is_screens=False, auto_restore=True):
+    """Optimize single file"""
+    source_path, original_content = load_file(file_path, auto_restore)
+    if original_content is None:
+        return -1  # Return -1 to indicate error
     
+    content, modified_count = apply_configs(original_content, configs, is_screens)
+    save_file(file_path, source_path, original_content, content)
     return modified_count
 
 def optimize_gui(auto_restore=True):
@@ -320,16 +359,19 @@ def optimize_screens(auto_restore=True):
     """Modify screens.rpy file, adjust viewport and navigation bar sizes"""
     print(f"\nProcessing: {screens_path}")
     print("-" * 40)
-    count = optimize_file(screens_path, screens_numeric_configs, is_screens=True, auto_restore=auto_restore)
-    if count < 0:
+    # Read once, apply configs and scroll support on the same text, write once
+    source_path, original_content = load_file(screens_path, auto_restore)
+    if original_content is None:
         print(f"Error: Failed to process screens.rpy")
         return -1
+    content, count = apply_configs(original_content, screens_numeric_configs, is_screens=True)
     
     # Add dialogue scroll support
     print("\n  [Extra] Adding dialogue scroll support...")
-    scroll_count = add_scroll_to_say_screen(screens_path)
-    if scroll_count > 0:
-        count += scroll_count
+    content, scroll_count = add_scroll_to_say_screen(content)
+    count += scroll_count
+    
+    save_file(screens_path, source_path, original_content, content)
     
     print(f"Total {count} config(s) modified")
     return count
@@ -372,6 +414,5 @@ def main():
 
 
 if __name__ == "__main__":
-    import sys
     main()
     sys.exit(0)
@@ -1,4 +1,8 @@
+import functools
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 
 # Original design resolution
@@ -14,6 +18,9 @@ SCALE_RATIO = VITA_HEIGHT / ORIGINAL_HEIGHT
 # Get parent directory of script directory (project root)
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# All processed paths live under base_dir, so relative paths are a plain slice
+_BASE_PREFIX_LEN = len(base_dir) + 1
+
 # Image directories to process
 target_dirs = [
     os.path.join(base_dir, 'game', 'images'),
@@ -22,8 +29,40 @@ target_dirs = [
 
 # Supported image formats
 supported_formats = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+# Same set without dots, for checking only the lowercased extension
+_EXTS = frozenset(fmt[1:] for fmt in supported_formats)
+
+# Save settings: default keeps output close to the original, --fast trades
+# file size for encode speed on bulk conversions
+PNG_COMPRESS_LEVEL = 6
+JPEG_QUALITY = 95
+FAST_PNG_COMPRESS_LEVEL = 1
+FAST_JPEG_QUALITY = 90
+
+# Records (mtime, size) of optimized images, so re-runs skip them instead of shrinking again
+CACHE_PATH = os.path.join(base_dir, '.vita_cache.json')
+
+def load_cache():
+    """Load optimized image cache {relative_path: [mtime_ns, size]}"""
+    try:
+        with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-def optimize_image(image_path):
+def save_cache(cache):
+    """Save optimized image cache (through a temp file, an interrupted save keeps the old cache)"""
+    temp_path = CACHE_PATH + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(temp_path, CACHE_PATH)
+
+def get_cache_key(image_path):
+    """Get (mtime, size) of file as stored in cache"""
+    stat = os.stat(image_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def optimize_image(image_path, png_compress_level=PNG_COMPRESS_LEVEL, jpeg_quality=JPEG_QUALITY):
     """Scale images by uniform ratio for PS Vita screen"""
     try:
         with Image.open(image_path) as img:
@@ -35,73 +74,127 @@ def optimize_image(image_path):
             
             # If size unchanged, skip
             if new_width == original_width and new_height == original_height:
-                rel_path = os.path.relpath(image_path, base_dir)
+                rel_path = image_path[_BASE_PREFIX_LEN:]
                 return False, f"Skipped (no size change): {rel_path}"
             
+            # JPEG: let libjpeg decode at a reduced DCT scale when that still leaves
+            # at least 2x the target size (no-op for the usual 0.75 ratio)
+            if img.format in ('JPEG', 'JPG'):
+                img.draft(img.mode, (new_width * 2, new_height * 2))
+            
+            # Palette images would be resized with NEAREST, convert once up front
+            # so LANCZOS applies (keep alpha only if the palette has transparency)
+            src_img = img
+            if img.mode == 'P':
+                src_img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+            
             # Resize image, use LANCZOS to maintain quality
-            resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            resized_img = src_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
             
             # Save image, keep original format
             if img.format == 'PNG':
-                # PNG saved as-is
-                resized_img.save(image_path, 'PNG')
+                # PNG saved as-is, zlib level only (optimize=True would override it with level 9)
+                resized_img.save(image_path, 'PNG', compress_level=png_compress_level, optimize=False)
             elif img.format in ('JPEG', 'JPG'):
                 # JPEG saved with high quality
-                resized_img.save(image_path, 'JPEG', quality=95, optimize=True)
+                resized_img.save(image_path, 'JPEG', quality=jpeg_quality, optimize=True)
             else:
                 # Other formats use original format
                 resized_img.save(image_path, img.format)
             
             # Show relative path for clarity
-            rel_path = os.path.relpath(image_path, base_dir)
+            rel_path = image_path[_BASE_PREFIX_LEN:]
             return True, f"Optimized: {rel_path} ({original_width}x{original_height} -> {new_width}x{new_height})"
     
     except Exception as e:
-        rel_path = os.path.relpath(image_path, base_dir)
+        rel_path = image_path[_BASE_PREFIX_LEN:]
         return False, f"Error processing {rel_path}: {str(e)}"
 
-def process_directory(directory):
+def _iter_images(root):
+    """Recursively yield supported image paths using os.scandir"""
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_images(entry.path)
+            else:
+                _, dot, ext = entry.name.rpartition('.')
+                if dot and ext.lower() in _EXTS:
+                    yield entry.path
+
+def process_directory(directory, cache=None, fast=False):
     """Recursively process all images in directory"""
     processed_count = 0
     skipped_count = 0
     error_count = 0
+    if cache is None:
+        cache = {}
+    # Per-image log lines, written in one go at the end instead of one print each
+    msgs = []
+    
+    # Collect files first (skipping cached ones without opening them),
+    # then decode/resize/encode them in parallel
+    image_paths = []
+    for image_path in _iter_images(directory):
+        rel_path = image_path[_BASE_PREFIX_LEN:]
+        if cache.get(rel_path) == get_cache_key(image_path):
+            msgs.append(f"Skipped (cached): {rel_path}\n")
+            skipped_count += 1
+        else:
+            image_paths.append(image_path)
     
-    for root, dirs, files in os.walk(directory):
-        for filename in files:
-            if filename.lower().endswith(supported_formats):
-                image_path = os.path.join(root, filename)
-                success, message = optimize_image(image_path)
-                print(message)
-                
-                if success:
-                    processed_count += 1
-                elif "Skipped" in message:
-                    skipped_count += 1
-                elif "Error" in message:
-                    error_count += 1
+    if fast:
+        worker = functools.partial(optimize_image, png_compress_level=FAST_PNG_COMPRESS_LEVEL, jpeg_quality=FAST_JPEG_QUALITY)
+    else:
+        worker = optimize_image
+    
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(worker, image_paths, chunksize=8)
+        for image_path, (success, message) in zip(image_paths, results):
+            msgs.append(message + '\n')
+            
+            if success:
+                processed_count += 1
+                cache[image_path[_BASE_PREFIX_LEN:]] = get_cache_key(image_path)
+            elif "Skipped" in message:
+                skipped_count += 1
+            elif "Error" in message:
+                error_count += 1
     
+    sys.stdout.writelines(msgs)
     return processed_count, skipped_count, error_count
 
 def main():
+    # Check for --fast argument
+    fast = '--fast' in sys.argv
+    
     print(f"Starting image optimization...")
     print(f"Target directories: game/images/ and game/gui/")
     print(f"Original design resolution: {ORIGINAL_WIDTH}x{ORIGINAL_HEIGHT}")
     print(f"PS Vita resolution: {VITA_WIDTH}x{VITA_HEIGHT}")
     print(f"Uniform scale ratio: {SCALE_RATIO:.4f}")
+    if fast:
+        print(f"Mode: Fast (PNG compress level {FAST_PNG_COMPRESS_LEVEL}, JPEG quality {FAST_JPEG_QUALITY})")
     print("-" * 50)
     
     total_processed = 0
     total_skipped = 0
     total_errors = 0
+    cache = load_cache()
     
-    for target_dir in target_dirs:
-        if os.path.exists(target_dir):
-            processed, skipped, errors = process_directory(target_dir)
-            total_processed += processed
-            total_skipped += skipped
-            total_errors += errors
-        else:
-            print(f"Warning: Directory does not exist, skipping: {target_dir}")
+    # Save the cache after every directory, and also when the run is interrupted,
+    # otherwise the next run would shrink the already resized images again
+    try:
+        for target_dir in target_dirs:
+            if os.path.exists(target_dir):
+                processed, skipped, errors = process_directory(target_dir, cache, fast=fast)
+                total_processed += processed
+                total_skipped += skipped
+                total_errors += errors
+                save_cache(cache)
+            else:
+                print(f"Warning: Directory does not exist, skipping: {target_dir}")
+    finally:
+        save_cache(cache)
     
     print("-" * 50)
     print(f"Processing complete!")
@@ -112,6 +205,5 @@ def main():
 
 
 if __name__ == "__main__":
-    import sys
     success = main()
     sys.exit(0 if success else 1)
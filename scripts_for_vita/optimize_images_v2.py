@@ -1,9 +1,26 @@
+import io
+import itertools
+import multiprocessing
 import os
 import shutil
 import tempfile
 import subprocess
 import sys
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+import PIL
+from PIL import Image, features
+
+# Optional: libimagequant bindings (the library behind pngquant) quantize in-process,
+# without pngquant.exe, process spawns or temp files
+try:
+    import imagequant
+    HAS_IMAGEQUANT = True
+except ImportError:
+    HAS_IMAGEQUANT = False
+
+# Pillow-SIMD (AVX2 resampling) is a drop-in PIL replacement, its releases carry a .postN suffix
+HAS_PILLOW_SIMD = '.post' in PIL.__version__
+HAS_JPEG_TURBO = bool(features.check_feature('libjpeg_turbo'))
 
 # Get script directory
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -24,15 +41,9 @@ def download_pngquant():
         # Download to temp file
         temp_zip = os.path.join(tempfile.gettempdir(), 'pngquant.zip')
         
-        # Download with progress
-        def download_progress(block_num, block_size, total_size):
-            downloaded = block_num * block_size
-            percent = min(100, int(downloaded * 100 / total_size)) if total_size > 0 else 0
-            if block_num % 10 == 0:  # Update every 10 blocks
-                print(f"    Progress: {percent}%", end='\r')
-        
-        urllib.request.urlretrieve(download_url, temp_zip, reporthook=download_progress)
-        print(f"    Progress: 100%")
+        # Stream to disk with 1MB copies, no per-block progress hook
+        with urllib.request.urlopen(download_url) as response, open(temp_zip, 'wb') as f:
+            shutil.copyfileobj(response, f, length=1 << 20)
         print(f"  - Downloaded to: {temp_zip}")
         
         # Extract
@@ -120,48 +131,125 @@ def get_pngquant_cmd():
         return PNGQUANT_PATH
     return 'pngquant'
 
-# Get best quantization method
-def get_quantize_method(is_rgba=False):
-    """Get best quantization method"""
-    if is_rgba:
-        return Image.Quantize.FASTOCTREE
-    else:
-        return Image.Quantize.MAXCOVERAGE
+# Best built-in quantization method (RGBA only supports FASTOCTREE), dither and resampling filter
+_QUANT_RGBA = Image.Quantize.FASTOCTREE
+_QUANT_RGB = Image.Quantize.MAXCOVERAGE
+_DITHER = Image.Dither.FLOYDSTEINBERG
+_BICUBIC = Image.Resampling.BICUBIC
+
+# Images per worker batch, taken lazily from the directory walk
+# (pngquant then runs at most once per color count per batch)
+PNGQUANT_BATCH_SIZE = 16
+# Images per color count handed to pngquant while the rest of the batch is still encoding
+PNGQUANT_PIPELINE_CHUNK = 8
 
-def save_png_with_pngquant(img, temp_path, colors=128):
-    """Optimize PNG using pngquant command line tool"""
+def save_png_with_pngquant(img, buf, colors=128, is_rgba=False):
+    """Encode pngquant input for img in memory, return deferred pngquant job (None if unavailable)"""
     if not HAS_PNGQUANT:
-        return False
+        return None
     
     try:
-        # Save temp PNG first
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_in:
-            temp_in = tmp_in.name
-        
-        # Save as temp file
-        if img.mode == 'P':
-            img.save(temp_in, 'PNG')
-        else:
-            # Convert to RGB/RGBA and save
-            img.save(temp_in, 'PNG')
+        # Fast deflate is enough, pngquant re-compresses its output anyway
+        input_buf = io.BytesIO()
+        img.save(input_buf, 'PNG', compress_level=1)
         
-        # Process with pngquant
-        cmd = [
-            get_pngquant_cmd(),
-            str(colors),
-            '--quality=65-80',
-            '--speed', '1',  # Highest quality
-            '--strip',
-            '--force',
-            '-o', temp_path,
-            temp_in
-        ]
-        result = subprocess.run(cmd, capture_output=True)
-        os.remove(temp_in)
-        
-        return result.returncode == 0 and os.path.exists(temp_path)
+        label = "RGBA palette" if is_rgba else "Palette"
+        return {
+            'data': input_buf.getvalue(),
+            'output': buf,
+            'colors': colors,
+            'is_rgba': is_rgba,
+            'mode': f"{label}({colors} colors+pngquant)",
+        }
     except Exception:
-        return False
+        return None
+
+def save_png_with_imagequant(img, buf, colors=128, is_rgba=False):
+    """Quantize in-process with libimagequant and save PNG to buffer, return mode used (None if quality not met)"""
+    try:
+        img_p = imagequant.quantize_pil_image(img.convert('RGBA'), max_colors=colors, min_quality=65, max_quality=80)
+    except RuntimeError:
+        return None
+    if RGB565:
+        snap_palette_rgb565(img_p)
+    img_p.save(buf, 'PNG', optimize=True)
+    label = "RGBA palette" if is_rgba else "Palette"
+    return f"{label}({colors} colors+imagequant)"
+
+def get_pngquant_args(colors):
+    """Get pngquant command without input/output arguments"""
+    args = [
+        get_pngquant_cmd(),
+        str(colors),
+        '--quality=65-80',
+        '--speed', '1',  # Highest quality
+        '--strip',
+        '--force'
+    ]
+    return args
+
+def run_pngquant_pipe(job):
+    """Quantize single job through pngquant stdin/stdout, sets job['ok']"""
+    job['ok'] = False
+    try:
+        result = subprocess.run(get_pngquant_args(job['colors']) + ['-'], input=job['data'], capture_output=True)
+    except Exception:
+        return
+    if result.returncode == 0 and result.stdout:
+        job['output'].write(result.stdout)
+        job['ok'] = True
+
+def fail_pngquant_jobs(jobs):
+    """Mark jobs as failed and drop any partial output, finish_pngquant then quantizes them built-in"""
+    for job in jobs:
+        job['ok'] = False
+        job['output'].seek(0)
+        job['output'].truncate()
+
+def run_pngquant_batch(jobs):
+    """Run deferred pngquant jobs, one pngquant process per color count, sets job['ok']"""
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job['colors'], []).append(job)
+    
+    for colors, group in groups.items():
+        # A single image needs no files at all, pipe it through stdin/stdout
+        if len(group) == 1:
+            run_pngquant_pipe(group[0])
+            continue
+        
+        # Several images share one process, which needs them as input files
+        temp_inputs = []
+        try:
+            for job in group:
+                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_in:
+                    temp_inputs.append(tmp_in.name)
+                    tmp_in.write(job['data'])
+            
+            # pngquant writes x.png to x_q.png next to each input
+            cmd = get_pngquant_args(colors) + ['--ext', '_q.png', '--'] + temp_inputs
+            try:
+                subprocess.run(cmd, capture_output=True)
+            except Exception:
+                pass
+            
+            # A missing output means pngquant failed (or missed quality) for that file
+            for job, temp_in in zip(group, temp_inputs):
+                quantized = temp_in[:-len('.png')] + '_q.png'
+                job['ok'] = os.path.exists(quantized)
+                if job['ok']:
+                    with open(quantized, 'rb') as f:
+                        job['output'].write(f.read())
+        except Exception:
+            # Temp file trouble only costs this color group, its images are quantized built-in
+            fail_pngquant_jobs(group)
+        finally:
+            for temp_in in temp_inputs:
+                for path in (temp_in, temp_in[:-len('.png')] + '_q.png'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
 
 # Original design resolution
 ORIGINAL_WIDTH = 1280
@@ -185,185 +273,336 @@ target_dirs = [
 # Supported image formats
 supported_formats = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
 
+# --rgb565: snap palettes to RGB565 levels (Vita 16-bit texture grid), so colors
+# do not shift again when stored as 16-bit textures
+RGB565 = '--rgb565' in sys.argv
+
 def get_file_size_mb(file_path):
     """Get file size in MB"""
     return os.path.getsize(file_path) / (1024 * 1024)
 
+def snap_palette_rgb565(img_p):
+    """Snap P image palette to RGB565 levels in place (alpha unchanged)"""
+    rawmode = img_p.palette.mode
+    palette = img_p.getpalette(rawmode)
+    stride = len(rawmode)
+    for i in range(0, len(palette), stride):
+        # 5 bits red/blue, 6 bits green, high bits replicated so 255 stays 255
+        r, g, b = palette[i] & 0xF8, palette[i + 1] & 0xFC, palette[i + 2] & 0xF8
+        palette[i] = r | (r >> 5)
+        palette[i + 1] = g | (g >> 6)
+        palette[i + 2] = b | (b >> 5)
+    img_p.putpalette(palette, rawmode)
+
+def get_buffer_size_mb(buf):
+    """Get size of encoded buffer in MB"""
+    return buf.getbuffer().nbytes / (1024 * 1024)
+
+def replace_file(file_path, data):
+    """Replace file with data through a temp file in the same directory"""
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(file_path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates 0600 files, keep the original permissions
+        shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    except:
+        # Clean up temp file on error
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 def has_transparency(img):
     """Check if image has alpha channel"""
     if img.mode in ('RGBA', 'LA', 'PA'):
-        # Check if alpha channel has non-fully-opaque pixels
-        alpha = img.split()[-1]
-        return any(p < 255 for p in alpha.getdata())
+        # Check if alpha channel has non-fully-opaque pixels (min alpha from Pillow's C extrema scan)
+        alpha = img.getchannel('A')
+        return alpha.getextrema()[0] < 255
     return False
 
-def save_png_optimized(img, temp_path, original_size_mb, force_webp=False):
-    """Optimize and save PNG to temp file, return mode used"""
+def quantize_png(img, buf, colors, is_rgba=False):
+    """Quantize with built-in algorithm and save PNG to buffer, return mode used"""
+    method = _QUANT_RGBA if is_rgba else _QUANT_RGB
+    # Pillow builds the palette and remaps with Floyd-Steinberg in one C pass
+    img_p = img.quantize(colors=colors, method=method, dither=_DITHER)
+    if RGB565:
+        snap_palette_rgb565(img_p)
+    img_p.save(buf, 'PNG', optimize=True)
+    if is_rgba:
+        return f"RGBA palette({colors} colors+FASTOCTREE+dither)"
+    return f"Palette({colors} colors+MAXCOVERAGE+dither)"
+
+def quantize_best(img, buf, colors, is_rgba=False):
+    """Quantize with best available tool, return (mode used, deferred pngquant job or None)"""
+    # In-process libimagequant first
+    if HAS_IMAGEQUANT:
+        mode = save_png_with_imagequant(img, buf, colors, is_rgba)
+        if mode:
+            return mode, None
+        # Quality target missed, pngquant (same library) would miss it too
+        return quantize_png(img, buf, colors, is_rgba), None
+    
+    # Then pngquant (deferred to batch), otherwise built-in algorithm
+    job = save_png_with_pngquant(img, buf, colors, is_rgba)
+    if job:
+        return job['mode'], job
+    return quantize_png(img, buf, colors, is_rgba), None
+
+def save_png_optimized(img, buf, original_size_mb, force_webp=False):
+    """Optimize and save PNG to buffer, return (mode used, deferred pngquant job or None)"""
     # Check if has transparency
     transparent = has_transparency(img)
     
+    # All non-transparent outputs are RGB, convert once for every branch below
+    if not transparent and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    
     # If force WebP conversion enabled and non-transparent image, convert to WebP
     if force_webp and not transparent:
-        if img.mode in ('RGBA', 'LA', 'PA'):
-            img = img.convert('RGB')
-        elif img.mode not in ('RGB', 'L'):
-            img = img.convert('RGB')
-        img.save(temp_path, 'WEBP', quality=75, method=6)
-        return "WebP(quality 75)"
+        img.save(buf, 'WEBP', quality=75, method=6)
+        return "WebP(quality 75)", None
     
     # If image has transparency, use palette with fewer colors
     if transparent:
-        # Transparent images use 64 colors, try pngquant first, otherwise FASTOCTREE
-        if HAS_PNGQUANT and save_png_with_pngquant(img, temp_path, 64):
-            return "RGBA palette(64 colors+pngquant)"
-        method = get_quantize_method(is_rgba=True)
-        img_p = img.quantize(colors=64, method=method, dither=Image.Dither.FLOYDSTEINBERG)
-        img_p.save(temp_path, 'PNG', optimize=True)
-        return "RGBA palette(64 colors+FASTOCTREE+dither)"
+        # Transparent images use 64 colors, try imagequant/pngquant first, otherwise FASTOCTREE
+        return quantize_best(img, buf, 64, is_rgba=True)
     
     # For large files without transparency, use palette mode (lower threshold and colors)
     if original_size_mb > 0.15:
-        # Convert to RGB mode
-        if img.mode in ('RGBA', 'LA', 'PA'):
-            img = img.convert('RGB')
-        elif img.mode not in ('RGB', 'L'):
-            img = img.convert('RGB')
-        
-        # Try pngquant first, otherwise built-in algorithm
-        if HAS_PNGQUANT and save_png_with_pngquant(img, temp_path, 128):
-            return "Palette(128 colors+pngquant)"
-        method = get_quantize_method(is_rgba=False)
-        img_p = img.quantize(colors=128, method=method, dither=Image.Dither.FLOYDSTEINBERG)
-        img_p.save(temp_path, 'PNG', optimize=True)
-        return "Palette(128 colors+MAXCOVERAGE+dither)"
+        # Try imagequant/pngquant first, otherwise built-in algorithm
+        return quantize_best(img, buf, 128)
     # Other files use 32-color palette
     else:
-        if img.mode in ('RGBA', 'LA', 'PA'):
-            img = img.convert('RGB')
-        elif img.mode not in ('RGB', 'L'):
-            img = img.convert('RGB')
-        
-        # Try pngquant first, otherwise built-in algorithm
-        if HAS_PNGQUANT and save_png_with_pngquant(img, temp_path, 32):
-            return "Palette(32 colors+pngquant)"
-        method = get_quantize_method(is_rgba=False)
-        img_p = img.quantize(colors=32, method=method, dither=Image.Dither.FLOYDSTEINBERG)
-        img_p.save(temp_path, 'PNG', optimize=True)
-        return "Palette(32 colors+MAXCOVERAGE+dither)"
+        # Try imagequant/pngquant first, otherwise built-in algorithm
+        return quantize_best(img, buf, 32)
 
-def optimize_image(image_path):
-    """Scale images by uniform ratio for PS Vita screen and compress"""
-    try:
-        rel_path = os.path.relpath(image_path, base_dir)
-        original_size_mb = get_file_size_mb(image_path)
+def resize_image(img, new_width, new_height):
+    """Downscale image with BICUBIC, for the 0.75 ratio (1280x720 -> 960x544) it looks the same as LANCZOS"""
+    return img.resize((new_width, new_height), _BICUBIC)
+
+def prepare_image(image_path):
+    """Resize and encode image to memory buffer, returns (job, None) or (None, result)
+    
+    PNG quantization through pngquant is left in job['pngquant'] for the batch.
+    """
+    rel_path = os.path.relpath(image_path, base_dir)
+    original_size_mb = get_file_size_mb(image_path)
+    
+    with Image.open(image_path) as img:
+        original_width, original_height = img.size
         
-        with Image.open(image_path) as img:
-            original_width, original_height = img.size
-            
-            # Calculate new size (scale by 0.75)
-            new_width = int(original_width * SCALE_RATIO)
-            new_height = int(original_height * SCALE_RATIO)
+        # Calculate new size (scale by 0.75)
+        new_width = int(original_width * SCALE_RATIO)
+        new_height = int(original_height * SCALE_RATIO)
+        
+        job = {
+            'image_path': image_path,
+            'rel_path': rel_path,
+            'original_size_mb': original_size_mb,
+            'format': img.format,
+            'sizes': (original_width, original_height, new_width, new_height),
+            'resized_img': None,
+            'pngquant': None,
+        }
+        
+        # If size unchanged, still try to optimize compression
+        if new_width == original_width and new_height == original_height:
+            # For large files, try re-saving to optimize compression
+            if original_size_mb <= 0.05:  # Files >50KB try optimization
+                return None, (False, f"Skipped (no change needed): {rel_path}")
             
-            # If size unchanged, still try to optimize compression
-            if new_width == original_width and new_height == original_height:
-                # For large files, try re-saving to optimize compression
-                if original_size_mb > 0.05:  # Files >50KB try optimization
-                    # Use temp file
-                    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(image_path)[1], delete=False) as tmp:
-                        temp_path = tmp.name
-                    
-                    try:
-                        if img.format == 'PNG':
-                            mode = save_png_optimized(img, temp_path, original_size_mb)
-                        elif img.format in ('JPEG', 'JPG'):
-                            # JPEG reduce quality to 60 (more aggressive)
-                            save_img = img.convert('RGB')
-                            save_img.save(temp_path, 'JPEG', quality=60, optimize=True, progressive=True)
-                            mode = "quality 60"
-                        else:
-                            img.save(temp_path, img.format, optimize=True)
-                            mode = "standard opt"
-                        
-                        # Check compressed size
-                        new_size_mb = get_file_size_mb(temp_path)
-                        saved_mb = original_size_mb - new_size_mb
-                        
-                        if saved_mb > 0.001:  # Accept if saved >1KB
-                            # Replace original (use shutil.move for cross-disk support)
-                            shutil.move(temp_path, image_path)
-                            return True, f"Compressed: {rel_path} ({original_size_mb:.2f}MB -> {new_size_mb:.2f}MB, saved {saved_mb:.2f}MB) [{mode}]"
-                        else:
-                            # Compression not effective, delete temp, keep original
-                            os.remove(temp_path)
-                            return False, f"Skipped (poor compression): {rel_path}"
-                    except:
-                        # Clean up temp file on error
-                        if os.path.exists(temp_path):
-                            os.remove(temp_path)
-                        raise
-                return False, f"Skipped (no change needed): {rel_path}"
+            # Encode in memory, the file is only touched if the result is smaller
+            buf = io.BytesIO()
+            job['buf'] = buf
             
-            # Resize image, use LANCZOS to maintain quality
-            resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            if img.format == 'PNG':
+                mode, job['pngquant'] = save_png_optimized(img, buf, original_size_mb)
+            elif img.format in ('JPEG', 'JPG'):
+                # JPEG reduce quality to 60 (more aggressive)
+                save_img = img.convert('RGB')
+                save_img.save(buf, 'JPEG', quality=60, optimize=True, progressive=True)
+                mode = "quality 60"
+            else:
+                img.save(buf, img.format, optimize=True)
+                mode = "standard opt"
+            job['mode'] = mode
+            return job, None
+        
+        # JPEG: let libjpeg downscale in the DCT domain as far as it can while
+        # staying at least the target size, the resize then only refines the rest
+        if img.format in ('JPEG', 'JPG'):
+            img.draft('RGB', (new_width, new_height))
+        
+        # Resize image
+        resized_img = resize_image(img, new_width, new_height)
+        
+        # Encode in memory
+        buf = io.BytesIO()
+        job['buf'] = buf
+        
+        # Try 1: Save with optimized compression strategy
+        if img.format == 'PNG':
+            mode, job['pngquant'] = save_png_optimized(resized_img, buf, original_size_mb)
+        elif img.format in ('JPEG', 'JPG'):
+            # JPEG reduce quality to 60 to save space (more aggressive)
+            if resized_img.mode in ('RGBA', 'LA', 'P'):
+                resized_img = resized_img.convert('RGB')
+            resized_img.save(buf, 'JPEG', quality=60, optimize=True, progressive=True)
+            mode = "quality 60"
+        else:
+            # Other formats use original format
+            resized_img.save(buf, img.format)
+            mode = "standard"
+        job['mode'] = mode
+        job['resized_img'] = resized_img
+        return job, None
+
+def finish_pngquant(job):
+    """Fall back to built-in quantization if pngquant failed, snap its palette for RGB565"""
+    pq_job = job['pngquant']
+    buf = pq_job['output']
+    if not pq_job.get('ok'):
+        # pngquant input holds the exact image that was to be quantized
+        with Image.open(io.BytesIO(pq_job['data'])) as img:
+            job['mode'] = quantize_png(img, buf, pq_job['colors'], pq_job['is_rgba'])
+    elif RGB565:
+        # pngquant has no RGB565 option (--posterize would cut alpha too), snap like the other paths
+        with Image.open(io.BytesIO(buf.getvalue())) as img_p:
+            img_p.load()
+            snap_palette_rgb565(img_p)
+            buf.seek(0)
+            buf.truncate()
+            img_p.save(buf, 'PNG', optimize=True)
+
+def finalize_image(job):
+    """Check compressed size and replace original, returns (success, message)"""
+    image_path = job['image_path']
+    rel_path = job['rel_path']
+    buf = job['buf']
+    original_size_mb = job['original_size_mb']
+    original_width, original_height, new_width, new_height = job['sizes']
+    resized_img = job['resized_img']
+    mode = job['mode']
+    
+    try:
+        # Check compressed size before anything is written to disk
+        new_size_mb = get_buffer_size_mb(buf)
+        saved_mb = original_size_mb - new_size_mb
+        
+        if resized_img is None:
+            if saved_mb > 0.001:  # Accept if saved >1KB
+                replace_file(image_path, buf.getbuffer())
+                return True, f"Compressed: {rel_path} ({original_size_mb:.2f}MB -> {new_size_mb:.2f}MB, saved {saved_mb:.2f}MB) [{mode}]"
+            else:
+                # Compression not effective, keep original untouched
+                return False, f"Skipped (poor compression): {rel_path}"
+        
+        # If file got larger, try more conservative save (only resize, no aggressive compression)
+        if new_size_mb >= original_size_mb * 0.99:
+            # Try 2: Use basic optimization save
+            if job['format'] == 'PNG':
+                buf = io.BytesIO()
+                resized_img.save(buf, 'PNG', optimize=True, compress_level=9)
+                mode = "standard compress"
+            elif job['format'] in ('JPEG', 'JPG'):
+                if resized_img.mode in ('RGBA', 'LA', 'P'):
+                    save_img = resized_img.convert('RGB')
+                else:
+                    save_img = resized_img
+                buf = io.BytesIO()
+                save_img.save(buf, 'JPEG', quality=70, optimize=True, progressive=True)
+                mode = "quality 70"
             
-            # Save to temp file
-            with tempfile.NamedTemporaryFile(suffix=os.path.splitext(image_path)[1], delete=False) as tmp:
-                temp_path = tmp.name
+            # Check size again
+            new_size_mb = get_buffer_size_mb(buf)
+            saved_mb = original_size_mb - new_size_mb
+        
+        # Resize is required, replace regardless of file size
+        replace_file(image_path, buf.getbuffer())
+        
+        if saved_mb > 0:
+            return True, f"Optimized: {rel_path} ({original_width}x{original_height} -> {new_width}x{new_height}, {original_size_mb:.2f}MB -> {new_size_mb:.2f}MB, saved {saved_mb:.2f}MB) [{mode}]"
+        else:
+            return True, f"Resized: {rel_path} ({original_width}x{original_height} -> {new_width}x{new_height}, {original_size_mb:.2f}MB -> {new_size_mb:.2f}MB, increased {abs(saved_mb):.2f}MB) [{mode}]"
+    except Exception as e:
+        return False, f"Error processing {rel_path}: {str(e)}"
+
+def optimize_image_batch(image_paths):
+    """Optimize a batch of images with one pngquant run per color count, returns list of results"""
+    results = []
+    jobs = []
+    # pngquant runs in a background thread on filled chunks, overlapping with
+    # Pillow decode/resize/encode of the next images in the batch
+    pending = {}
+    futures = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for image_path in image_paths:
+            try:
+                job, result = prepare_image(image_path)
+            except Exception as e:
+                rel_path = os.path.relpath(image_path, base_dir)
+                results.append((False, f"Error processing {rel_path}: {str(e)}"))
+                continue
+            if result is not None:
+                results.append(result)
+                continue
+            jobs.append(job)
             
+            pq_job = job['pngquant']
+            if pq_job:
+                chunk = pending.setdefault(pq_job['colors'], [])
+                chunk.append(pq_job)
+                if len(chunk) >= PNGQUANT_PIPELINE_CHUNK:
+                    chunk = pending.pop(pq_job['colors'])
+                    futures.append((executor.submit(run_pngquant_batch, chunk), chunk))
+        
+        # Flush partial chunks and wait for all pngquant runs
+        remaining = [pq_job for chunk in pending.values() for pq_job in chunk]
+        if remaining:
+            futures.append((executor.submit(run_pngquant_batch, remaining), remaining))
+        for future, chunk in futures:
             try:
-                # Try 1: Save with optimized compression strategy
-                if img.format == 'PNG':
-                    mode = save_png_optimized(resized_img, temp_path, original_size_mb)
-                elif img.format in ('JPEG', 'JPG'):
-                    # JPEG reduce quality to 60 to save space (more aggressive)
-                    if resized_img.mode in ('RGBA', 'LA', 'P'):
-                        resized_img = resized_img.convert('RGB')
-                    resized_img.save(temp_path, 'JPEG', quality=60, optimize=True, progressive=True)
-                    mode = "quality 60"
-                else:
-                    # Other formats use original format
-                    resized_img.save(temp_path, img.format)
-                    mode = "standard"
-                
-                # Check compressed size
-                new_size_mb = get_file_size_mb(temp_path)
-                saved_mb = original_size_mb - new_size_mb
-                
-                # If file got larger, try more conservative save (only resize, no aggressive compression)
-                if new_size_mb >= original_size_mb * 0.99:
-                    # Try 2: Use basic optimization save
-                    if img.format == 'PNG':
-                        resized_img.save(temp_path, 'PNG', optimize=True, compress_level=9)
-                        mode = "standard compress"
-                    elif img.format in ('JPEG', 'JPG'):
-                        if resized_img.mode in ('RGBA', 'LA', 'P'):
-                            save_img = resized_img.convert('RGB')
-                        else:
-                            save_img = resized_img
-                        save_img.save(temp_path, 'JPEG', quality=70, optimize=True, progressive=True)
-                        mode = "quality 70"
-                    
-                    # Check size again
-                    new_size_mb = get_file_size_mb(temp_path)
-                    saved_mb = original_size_mb - new_size_mb
-                
-                # Resize is required, replace regardless of file size
-                # Replace original (use shutil.move for cross-disk support)
-                shutil.move(temp_path, image_path)
-                
-                if saved_mb > 0:
-                    return True, f"Optimized: {rel_path} ({original_width}x{original_height} -> {new_width}x{new_height}, {original_size_mb:.2f}MB -> {new_size_mb:.2f}MB, saved {saved_mb:.2f}MB) [{mode}]"
-                else:
-                    return True, f"Resized: {rel_path} ({original_width}x{original_height} -> {new_width}x{new_height}, {original_size_mb:.2f}MB -> {new_size_mb:.2f}MB, increased {abs(saved_mb):.2f}MB) [{mode}]"
-            except:
-                # Clean up temp file on error
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                raise
+                future.result()
+            except Exception:
+                # Never lose the rest of the batch, these images fall back to built-in quantization
+                fail_pngquant_jobs(chunk)
     
-    except Exception as e:
-        rel_path = os.path.relpath(image_path, base_dir)
-        return False, f"Error processing {rel_path}: {str(e)}"
+    for job in jobs:
+        if job['pngquant']:
+            try:
+                finish_pngquant(job)
+            except Exception as e:
+                results.append((False, f"Error processing {job['rel_path']}: {str(e)}"))
+                continue
+        results.append(finalize_image(job))
+    return results
+
+def optimize_image(image_path):
+    """Scale images by uniform ratio for PS Vita screen and compress"""
+    return optimize_image_batch([image_path])[0]
+
+def _init_worker(has_pngquant):
+    """Pool worker initializer, set pngquant availability"""
+    global HAS_PNGQUANT
+    HAS_PNGQUANT = has_pngquant
+
+def iter_images(directory):
+    """Recursively yield supported image paths"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_images(entry.path)
+            elif entry.is_file() and entry.name.lower().endswith(supported_formats):
+                yield entry.path
+
+def iter_batches(iterable, size):
+    """Yield lists of up to size items from iterable"""
+    iterator = iter(iterable)
+    batch = list(itertools.islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(iterator, size))
 
 def process_directory(directory):
     """Recursively process all images in directory"""
@@ -373,11 +612,12 @@ def process_directory(directory):
     total_saved_mb = 0
     total_increased_mb = 0
     
-    for root, dirs, files in os.walk(directory):
-        for filename in files:
-            if filename.lower().endswith(supported_formats):
-                image_path = os.path.join(root, filename)
-                success, message = optimize_image(image_path)
+    # Pass pngquant availability to workers (main may have just installed it)
+    processes = os.cpu_count() or 1
+    with multiprocessing.Pool(processes=processes, initializer=_init_worker, initargs=(HAS_PNGQUANT,)) as pool:
+        # imap_unordered pulls batches lazily, workers start while the walk continues
+        for results in pool.imap_unordered(optimize_image_batch, iter_batches(iter_images(directory), PNGQUANT_BATCH_SIZE)):
+            for success, message in results:
                 print(message)
                 
                 if success:
@@ -397,7 +637,7 @@ def process_directory(directory):
                     skipped_count += 1
                 elif "Error" in message:
                     error_count += 1
-    
+        
     return processed_count, skipped_count, error_count, total_saved_mb, total_increased_mb
 
 def main():
@@ -407,12 +647,14 @@ def main():
     print("PS Vita Image Optimization Tool")
     print("=" * 70)
     
-    # Check and auto-install pngquant if needed
-    if not HAS_PNGQUANT:
+    # Check and auto-install pngquant if needed (not used when imagequant is installed)
+    if not HAS_PNGQUANT and not HAS_IMAGEQUANT:
         if check_and_install_pngquant():
             HAS_PNGQUANT = True
     
-    if HAS_PNGQUANT:
+    if HAS_IMAGEQUANT:
+        print("✓ imagequant enabled (in-process libimagequant) - using high quality palette algorithm")
+    elif HAS_PNGQUANT:
         # Show which pngquant is being used
         if os.path.exists(PNGQUANT_PATH):
             print("✓ pngquant enabled (using local: scripts_for_vita/pngquant.exe) - using high quality palette algorithm")
@@ -421,7 +663,16 @@ def main():
     else:
         print("! pngquant not installed - using built-in MAXCOVERAGE algorithm")
         print("  Manual download: https://pngquant.org/ (for better color quality)")
+    if HAS_PILLOW_SIMD:
+        print(f"✓ Pillow-SIMD {PIL.__version__} enabled - using AVX2 resampling")
+    else:
+        print(f"! Stock Pillow {PIL.__version__} - resizes are faster with Pillow-SIMD:")
+        print("  pip uninstall -y Pillow && pip install --upgrade pillow-simd")
+    if not HAS_JPEG_TURBO:
+        print("! Pillow is not built with libjpeg-turbo - JPEG decode/encode will be slower")
     print("Compression strategy: PNG→32-128 color palette, JPEG→quality 60, Transparent PNG→64 color palette")
+    if RGB565:
+        print("Palette colors: snapped to RGB565 levels (--rgb565)")
     print(f"Target directories: game/images/ and game/gui/")
     print(f"Original design resolution: {ORIGINAL_WIDTH}x{ORIGINAL_HEIGHT}")
     print(f"PS Vita resolution: {VITA_WIDTH}x{VITA_HEIGHT}")
@@ -8,6 +8,100 @@ base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 snow_path = os.path.join(base_dir, 'game', 'snowblossom.rpy')
 
 
+def _repl_screen_cache(match):
+    """Append screen size cache after self.image_init in __init__"""
+    indent = match.group('indent')
+    return (f"{match.group(0)}\n"
+            f"{indent}\n"
+            f"{indent}# PSVita optimization: cache screen size to avoid per-frame config access\n"
+            f"{indent}self.screen_width = renpy.config.screen_width\n"
+            f"{indent}self.screen_height = renpy.config.screen_height")
+
+def _repl_create(match):
+    """Rewrite particle generation in create with local variables"""
+    indent = match.group('indent')
+    # Continuation lines line up under "SnowParticle("
+    cont = indent + ' ' * 22
+    return (f"{indent}# PSVita optimization: use local variables to reduce attribute access\n"
+            f"{indent}max_p = self.max_particles\n"
+            f"{indent}depth_val = self.depth\n"
+            f"{indent}depth = random.randint(1, depth_val)\n"
+            f"{indent}depth_speed = 1.5 - depth / (depth_val + 0.0)\n"
+            f"{indent}\n"
+            f"{indent}return [ SnowParticle(self.image[depth-1],\n"
+            f"{cont}random.uniform(-self.wind, self.wind) * depth_speed,\n"
+            f"{cont}self.speed * depth_speed,\n"
+            f"{cont}random.randint(self.xborder[0], self.xborder[1]),\n"
+            f"{cont}random.randint(self.yborder[0], self.yborder[1]),\n"
+            f"{cont}) ]")
+
+def _repl_update(match):
+    """Use the factory cached screen size in update"""
+    indent = match.group('indent')
+    return (f"{match.group('head')}"
+            f"{indent}# PSVita optimization: use factory cached screen size\n"
+            f"{indent}factory = self.factory\n"
+            f"{indent}\n"
+            f"{indent}{match.group('body')}"
+            f"{indent}# Use cached screen size\n"
+            f"{indent}if self.ypos > factory.screen_height or \\\n"
+            f"{indent}   (self.wind < 0 and self.xpos < 0) or \\\n"
+            f"{indent}   (self.wind > 0 and self.xpos > factory.screen_width):\n"
+            f"{indent}    return None\n")
+
+def _repl_particle_init(match):
+    """Add factory parameter and reference to SnowParticle constructor"""
+    indent = match.group('indent')
+    return (f"{match.group('def')}factory, {match.group('rest')}"
+            f"{indent}self.factory = factory  # PSVita optimization: cache factory reference\n"
+            f"{indent}self.image = image")
+
+# (pattern, replacement, description, skip if this marker is already in file)
+# Patterns match on anchor tokens with flexible whitespace, applied in order
+# (the factory argument is added to the call rewritten by the create pattern)
+PATTERNS = [
+    # 1. Reduce default particle count (50 -> 25)
+    (re.compile(r'(max_particles\s*=\s*)50\b'), r'\g<1>25',
+     "Default particle count: 50 -> 25", None),
+    # 2. Reduce default depth levels (10 -> 5)
+    (re.compile(r'(self\.depth\s*=\s*kwargs\.get\(\s*"depth"\s*,\s*)10(\s*\))'), r'\g<1>5\g<2>',
+     "Default depth levels: 10 -> 5", None),
+    # 3. Add screen size cache in __init__ (after self.image = self.image_init(image))
+    (re.compile(r'^(?P<indent>[ \t]*)self\.image\s*=\s*self\.image_init\(image\)[ \t]*$', re.MULTILINE), _repl_screen_cache,
+     "Added screen size cache", 'self.screen_width'),
+    # 4. Optimize particle generation in create method, use local variables
+    (re.compile(
+        r'(?:^[ \t]*\n)?^(?P<indent>[ \t]*)depth = random\.randint\(1,\s*self\.depth\)\s*?\n'
+        r'(?:[ \t]*\n)*[ \t]*depth_speed = 1\.5\s*-\s*depth\s*/\s*\(self\.depth\s*\+\s*0\.0\)\s*?\n'
+        r'(?:[ \t]*\n)*[ \t]*return \[\s*SnowParticle\(self\.image\[depth-1\],\s*'
+        r'random\.uniform\(-self\.wind,\s*self\.wind\)\s*\*\s*depth_speed,\s*'
+        r'self\.speed\s*\*\s*depth_speed,\s*'
+        r'random\.randint\(self\.xborder\[0\],\s*self\.xborder\[1\]\),\s*'
+        r'random\.randint\(self\.yborder\[0\],\s*self\.yborder\[1\]\),\s*\)\s*\]',
+        re.MULTILINE), _repl_create,
+     "Optimized create method (local variable caching)", None),
+    # 5. Optimize screen boundary check in update method
+    (re.compile(
+        r'(?P<head>Called internally in every frame to update the particle\.\s*"""[ \t]*\n)(?:[ \t]*\n)*'
+        r'(?P<indent>[ \t]*)(?P<body>if self\.oldst is None:.*?)'
+        r'^[ \t]*if self\.ypos > renpy\.config\.screen_height or\s*\\\s*'
+        r'\(self\.wind\s*<\s*0 and self\.xpos\s*<\s*0\) or\s*(?:\\\s*)?'
+        r'\(self\.wind\s*>\s*0 and self\.xpos\s*>\s*renpy\.config\.screen_width\):\s*'
+        r'return None[ \t]*\n',
+        re.MULTILINE | re.DOTALL), _repl_update,
+     "Optimized update method (using cached screen size)", 'factory = self.factory'),
+    # 6. Modify SnowParticle constructor, add factory reference
+    (re.compile(
+        r'(?P<def>def __init__\(self,\s*)(?P<rest>image,\s*wind,\s*speed,\s*xborder,\s*yborder\):\s*""".*?"""[ \t]*\n)'
+        r'(?:[ \t]*\n)*(?P<indent>[ \t]*)self\.image = image\b',
+        re.DOTALL), _repl_particle_init,
+     "Modified SnowParticle constructor, added factory parameter", 'self.factory = factory'),
+    # 7. Update particle creation call in create method, pass factory
+    (re.compile(r'SnowParticle\(self\.image\[depth-1\],'), 'SnowParticle(self, self.image[depth-1],',
+     "Updated particle creation call, passing factory reference", 'SnowParticle(self, self.image'),
+]
+
+
 def main():
     # Check if file exists
     if not os.path.exists(snow_path):
@@ -21,170 +115,12 @@ def main():
     original_content = content
     modifications = []
 
-    # 1. Reduce default particle count (50 -> 25)
-    if 'max_particles=50' in content:
-        content = content.replace('max_particles=50', 'max_particles=25')
-        modifications.append("Default particle count: 50 -> 25")
-
-    # 2. Reduce default depth levels (10 -> 5)
-    if 'self.depth = kwargs.get("depth", 10)' in content:
-        content = content.replace(
-            'self.depth = kwargs.get("depth", 10)',
-            'self.depth = kwargs.get("depth", 5)'
-        )
-        modifications.append("Default depth levels: 10 -> 5")
-
-    # 3. Add screen size cache in __init__ (after self.image = self.image_init(image))
-    old_image_init = "self.image = self.image_init(image)"
-    new_image_init = """self.image = self.image_init(image)
-            
-            # PSVita optimization: cache screen size to avoid per-frame config access
-            self.screen_width = renpy.config.screen_width
-            self.screen_height = renpy.config.screen_height"""
-
-    if old_image_init in content and 'self.screen_width' not in content:
-        content = content.replace(old_image_init, new_image_init)
-        modifications.append("Added screen size cache")
-
-    # 4. Optimize particle generation in create method, use local variables
-    old_create = """        def create(self, particles, st):
-            \"\"\"
-            This is internally called every frame by the Particles object to create new particles.
-            We'll just create new particles if the number of particles on the screen is
-            lower than the max number of particles we can have.
-            \"\"\"
-            if particles is None or len(particles) < self.max_particles:
-                
-                depth = random.randint(1, self.depth)
-                
-                depth_speed = 1.5-depth/(self.depth+0.0)
-                
-                return [ SnowParticle(self.image[depth-1],      
-                                      random.uniform(-self.wind, self.wind)*depth_speed,  
-                                      self.speed*depth_speed,  
-                                      random.randint(self.xborder[0], self.xborder[1]), 
-                                      random.randint(self.yborder[0], self.yborder[1]), 
-                                      ) ]"""
-
-    new_create = """        def create(self, particles, st):
-            \"\"\"
-            This is internally called every frame by the Particles object to create new particles.
-            We'll just create new particles if the number of particles on the screen is
-            lower than the max number we can have.
-            \"\"\"
-            if particles is None or len(particles) < self.max_particles:
-                # PSVita optimization: use local variables to reduce attribute access
-                max_p = self.max_particles
-                depth_val = self.depth
-                depth = random.randint(1, depth_val)
-                depth_speed = 1.5 - depth / (depth_val + 0.0)
-                
-                return [ SnowParticle(self.image[depth-1],
-                                      random.uniform(-self.wind, self.wind) * depth_speed,
-                                      self.speed * depth_speed,
-                                      random.randint(self.xborder[0], self.xborder[1]),
-                                      random.randint(self.yborder[0], self.yborder[1]),
-                                      ) ]"""
-
-    if old_create in content:
-        content = content.replace(old_create, new_create)
-        modifications.append("Optimized create method (local variable caching)")
-
-    # 5. Optimize screen boundary check in update method
-    old_update = """        def update(self, st):
-            \"\"\"
-            Called internally in every frame to update the particle.
-            \"\"\"
-            
-            
-            if self.oldst is None:
-                self.oldst = st
-            
-            lag = st - self.oldst
-            self.oldst = st
-            
-            self.xpos += lag * self.wind
-            self.ypos += lag * self.speed
-            
-            if self.ypos > renpy.config.screen_height or\\
-            (self.wind< 0 and self.xpos < 0) or (self.wind > 0 and self.xpos > renpy.config.screen_width):
-                    return None
-            
-            return int(self.xpos), int(self.ypos), st, self.image"""
-
-    new_update = """        def update(self, st):
-            \"\"\"
-            Called internally in every frame to update the particle.
-            \"\"\"
-            # PSVita optimization: use factory cached screen size
-            factory = self.factory
-            
-            if self.oldst is None:
-                self.oldst = st
-            
-            lag = st - self.oldst
-            self.oldst = st
-            
-            self.xpos += lag * self.wind
-            self.ypos += lag * self.speed
-            
-            # Use cached screen size
-            if self.ypos > factory.screen_height or \\
-               (self.wind < 0 and self.xpos < 0) or \\
-               (self.wind > 0 and self.xpos > factory.screen_width):
-                return None
-            
-            return int(self.xpos), int(self.ypos), st, self.image"""
-
-    if old_update in content and 'factory = self.factory' not in content:
-        content = content.replace(old_update, new_update)
-        modifications.append("Optimized update method (using cached screen size)")
-
-    # 6. Modify SnowParticle constructor, add factory reference
-    old_particle_init = """    class SnowParticle(object):
-        \"\"\"
-        Represents every particle in the screen.
-        \"\"\"
-        def __init__(self, image, wind, speed, xborder, yborder):
-            \"\"\"
-            Initializes the snow particle. This is called automatically when the object is created.
-            \"\"\"
-            
-            self.image = image"""
-
-    new_particle_init = """    class SnowParticle(object):
-        \"\"\"
-        Represents every particle in the screen.
-        \"\"\"
-        def __init__(self, factory, image, wind, speed, xborder, yborder):
-            \"\"\"
-            Initializes the snow particle. This is called automatically when the object is created.
-            \"\"\"
-            self.factory = factory  # PSVita optimization: cache factory reference
-            self.image = image"""
-
-    if old_particle_init in content and 'self.factory = factory' not in content:
-        content = content.replace(old_particle_init, new_particle_init)
-        modifications.append("Modified SnowParticle constructor, added factory parameter")
-
-    # 7. Update particle creation call in create method, pass factory
-    old_particle_create = """                return [ SnowParticle(self.image[depth-1],
-                                      random.uniform(-self.wind, self.wind) * depth_speed,
-                                      self.speed * depth_speed,
-                                      random.randint(self.xborder[0], self.xborder[1]),
-                                      random.randint(self.yborder[0], self.yborder[1]),
-                                      ) ]"""
-
-    new_particle_create = """                return [ SnowParticle(self, self.image[depth-1],
-                                      random.uniform(-self.wind, self.wind) * depth_speed,
-                                      self.speed * depth_speed,
-                                      random.randint(self.xborder[0], self.xborder[1]),
-                                      random.randint(self.yborder[0], self.yborder[1]),
-                                      ) ]"""
-
-    if old_particle_create in content and 'SnowParticle(self, self.image' not in content:
-        content = content.replace(old_particle_create, new_particle_create)
-        modifications.append("Updated particle creation call, passing factory reference")
+    for pattern, repl, description, marker in PATTERNS:
+        if marker and marker in content:
+            continue
+        content, count = pattern.subn(repl, content)
+        if count:
+            modifications.append(description)
 
     # Write back to file
     if content != original_content:
@@ -8,190 +8,274 @@ Features:
 4. Support dry-run mode to preview changes
 """
 
+import functools
+import io
 import os
 import re
 import sys
 import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
+# Optional: pyahocorasick matches all webm names in a single pass per line
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+# Regex: match, over the whole file, lines to comment out (already commented lines never match)
+# - movie_cutscene calls (including indented): the call is kept, the rest of its line is dropped
+# - any other code line containing .webm that mentions movie_cutscene/Video/Movie (case-sensitive)
+_COMMENT_PATTERN = re.compile(
+    r'^(?:(?P<indent>[^\S\n]*)'
+    r'(?P<code>(?:\$|python:[^\S\n]*)?[^\S\n]*renpy\.movie_cutscene[^\S\n]*\(.*\.webm.*\)).*\n?'
+    r'|(?=(?P<line>[^#\n]*\.webm.*))(?=.*(?-i:movie_cutscene|Video|Movie)))',
+    re.IGNORECASE | re.MULTILINE)
+# Regex: match, over the whole file, commented out webm lines mentioning movie_cutscene/Video/Movie
+_COMMENTED_PATTERN = re.compile(
+    r'^(?=.*(?-i:movie_cutscene|Video|Movie))(?P<indent>[^\S\n]*)#[^\S\n]*(?P<code>.*\.webm.*)\n?',
+    re.IGNORECASE | re.MULTILINE)
+# Regex: raw file prefilter, scripts without any .webm are left alone
+_WEBM_BYTES_PATTERN = re.compile(rb'\.webm', re.IGNORECASE)
+# Regex: .webm occurrences in text, where the webm name lookup is anchored
+_WEBM_SUFFIX_PATTERN = re.compile(r'\.webm', re.IGNORECASE)
 
 def get_project_root():
     """Get project root directory"""
     return Path(__file__).parent.parent.resolve()
 
 
-def find_webm_files(project_root):
-    """Recursively find all .webm files"""
+def _scandir_recursive(path):
+    """Recursively yield DirEntry objects for files under path (symlinked dirs are not followed)"""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scandir_recursive(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def scan_game_assets(project_root):
+    """Walk game/ once, returns (webm_files, rpy_files) - webm_files holds (path, size) tuples"""
     game_dir = project_root / 'game'
     if not game_dir.exists():
-        return []
+        return [], []
     
     webm_files = []
-    for webm_path in game_dir.rglob('*.webm'):
-        webm_files.append(webm_path)
-    return webm_files
+    rpy_files = []
+    for entry in _scandir_recursive(game_dir):
+        ext = os.path.splitext(os.path.normcase(entry.name))[1]
+        if ext == '.webm':
+            # Size comes from the DirEntry stat, no extra stat when it is printed
+            webm_files.append((Path(entry.path), entry.stat().st_size))
+        elif ext == '.rpy':
+            rpy_files.append(Path(entry.path))
+    return webm_files, rpy_files
 
 
-def find_rpy_files(project_root):
-    """Recursively find all .rpy script files"""
-    game_dir = project_root / 'game'
-    if not game_dir.exists():
-        return []
+@functools.lru_cache(maxsize=None)
+def build_name_matcher(webm_names):
+    """Build a function telling whether a line contains any of webm_names (a tuple), None if there are no names
     
-    rpy_files = []
-    for rpy_path in game_dir.rglob('*.rpy'):
-        rpy_files.append(rpy_path)
-    return rpy_files
+    Cached per name tuple, so repeated scans of the same webm set reuse the automaton/name set.
+    """
+    if not webm_names:
+        return None
+    
+    if HAS_AHOCORASICK:
+        automaton = ahocorasick.Automaton()
+        for name in webm_names:
+            automaton.add_word(name, name)
+        automaton.make_automaton()
+        
+        def contains_name(line):
+            return next(automaton.iter(line), None) is not None
+        return contains_name
+    
+    # Fallback: every name ends in .webm, so at each .webm only the text ending there
+    # (one slice per distinct name length) is looked up in a set of the names
+    name_set = frozenset(webm_names)
+    lengths = sorted({len(name) for name in webm_names})
+    
+    def contains_name(line):
+        for match in _WEBM_SUFFIX_PATTERN.finditer(line):
+            end = match.end()
+            for length in lengths:
+                if length > end:
+                    break
+                if line[end - length:end] in name_set:
+                    return True
+        return False
+    return contains_name
 
 
-def find_webm_references(rpy_file, webm_names):
+def find_webm_references(rpy_file, contains_name, out=None):
     """
-    Find webm references in .rpy file
+    Find webm references in .rpy file, contains_name comes from build_name_matcher
+    Messages go to out (default sys.stdout)
     Returns: [(line_num, original_line, is_movie_cutscene), ...]
     """
     references = []
     try:
-        with open(rpy_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        content = read_webm_script(rpy_file)
     except Exception as e:
-        print(f"  Warning: Cannot read file {rpy_file}: {e}")
+        print(f"  Warning: Cannot read file {rpy_file}: {e}", file=out)
+        return references
+    
+    # Probe the whole file once, only files with a hit get the line-numbered scan
+    if content is None or contains_name is None or not contains_name(content):
         return references
     
     # Match movie_cutscene calls or any lines containing webm names
-    for line_num, line in enumerate(lines, 1):
-        for webm_name in webm_names:
-            if webm_name in line:
-                is_movie_cutscene = 'movie_cutscene' in line
-                references.append((line_num, line, is_movie_cutscene))
-                break
+    # (lines are streamed from the loaded text, no list of all lines)
+    for line_num, line in enumerate(io.StringIO(content), 1):
+        if contains_name(line):
+            is_movie_cutscene = 'movie_cutscene' in line
+            references.append((line_num, line, is_movie_cutscene))
     
     return references
 
 
-def comment_webm_lines(rpy_file, dry_run=False):
+def read_webm_script(rpy_file):
+    """Read .rpy file text (universal newlines, like text mode), None if it never mentions .webm"""
+    data = rpy_file.read_bytes()
+    # Most scripts have no webm at all, skip them before decoding and splitting lines
+    if not _WEBM_BYTES_PATTERN.search(data):
+        return None
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def write_webm_script(rpy_file, content):
+    """Write .rpy file text in a single write, with platform line endings like text mode"""
+    if os.linesep != '\n':
+        content = content.replace('\n', os.linesep)
+    rpy_file.write_bytes(content.encode('utf-8'))
+
+
+def _comment_line(match):
+    """_COMMENT_PATTERN replacement: comment out the matched line"""
+    code = match.group('code')
+    if code is not None:
+        return f"{match.group('indent')}# {code}\n"
+    # Other webm code: zero-width match at line start, just insert the comment mark
+    return "# "
+
+
+def _uncomment_line(match):
+    """_COMMENTED_PATTERN replacement: restore the matched line"""
+    return f"{match.group('indent')}{match.group('code')}\n"
+
+
+def comment_webm_lines(rpy_file, dry_run=False, out=None):
     """Comment out lines containing webm (especially movie_cutscene calls)
+    Messages go to out (default sys.stdout)
     Returns: (modified, error) - modified is True if changes were made, error is True if an error occurred
     """
     try:
-        with open(rpy_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            lines = content.splitlines(keepends=True)
+        content = read_webm_script(rpy_file)
     except Exception as e:
-        print(f"  Error: Cannot read file {rpy_file}: {e}")
+        print(f"  Error: Cannot read file {rpy_file}: {e}", file=out)
         return False, True
+    if content is None:
+        return False, False
     
-    modified = False
-    new_lines = []
-    commented_count = 0
-    
-    # Regex: match movie_cutscene calls (including indented)
-    movie_pattern = re.compile(r'^(\s*)((\$|python:\s*)?\s*renpy\.movie_cutscene\s*\(.*\.webm.*\))', re.IGNORECASE)
-    # Regex: match any code line containing .webm (excluding already commented)
-    webm_pattern = re.compile(r'^(\s*)([^#\n]*\.webm)', re.IGNORECASE)
-    
-    for line in lines:
-        stripped = line.lstrip()
-        
-        # Skip already commented lines
-        if stripped.startswith('#'):
-            new_lines.append(line)
-            continue
-        
-        # Try to match movie_cutscene
-        match = movie_pattern.match(line)
-        if match:
-            indent = match.group(1)
-            code = match.group(2)
-            new_line = f"{indent}# {code}\n" if not line.endswith('\n') else f"{indent}# {code}\n"
-            new_lines.append(new_line)
-            modified = True
-            commented_count += 1
-            if dry_run:
-                print(f"  [Preview] Will comment line: {line.strip()[:80]}")
-            continue
-        
-        # Try to match other webm containing code
-        match = webm_pattern.match(line)
-        if match and ('movie_cutscene' in line or 'Video' in line or 'Movie' in line):
-            new_line = f"# {line}" if not line.startswith('#') else line
-            new_lines.append(new_line)
-            modified = True
+    if dry_run:
+        # Preview only needs the matched lines, the rewritten content is never built
+        commented_count = 0
+        for match in _COMMENT_PATTERN.finditer(content):
+            line = match.group(0) if match.group('code') is not None else match.group('line')
+            print(f"  [Preview] Will comment line: {line.strip()[:80]}", file=out)
             commented_count += 1
-            if dry_run:
-                print(f"  [Preview] Will comment line: {line.strip()[:80]}")
-            continue
-        
-        new_lines.append(line)
+        return commented_count > 0, False
+    
+    # One pass over the whole file in the regex engine instead of a Python loop per line
+    new_content, commented_count = _COMMENT_PATTERN.subn(_comment_line, content)
+    modified = commented_count > 0
     
-    if modified and not dry_run:
+    if modified:
         try:
-            with open(rpy_file, 'w', encoding='utf-8') as f:
-                f.writelines(new_lines)
-            print(f"  Commented {commented_count} lines of webm related code")
+            write_webm_script(rpy_file, new_content)
+            print(f"  Commented {commented_count} lines of webm related code", file=out)
         except Exception as e:
-            print(f"  Error: Cannot write file {rpy_file}: {e}")
+            print(f"  Error: Cannot write file {rpy_file}: {e}", file=out)
             return False, True
     
     return modified, False
 
 
-def uncomment_webm_lines(rpy_file, dry_run=False):
+def uncomment_webm_lines(rpy_file, dry_run=False, out=None):
     """Uncomment lines containing webm (restore mode)
+    Messages go to out (default sys.stdout)
     Returns: (modified, error) - modified is True if changes were made, error is True if an error occurred
     """
     try:
-        with open(rpy_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            lines = content.splitlines(keepends=True)
+        content = read_webm_script(rpy_file)
     except Exception as e:
-        print(f"  Error: Cannot read file {rpy_file}: {e}")
+        print(f"  Error: Cannot read file {rpy_file}: {e}", file=out)
         return False, True
+    if content is None:
+        return False, False
     
-    modified = False
-    new_lines = []
-    uncommented_count = 0
-    
-    # Match commented out webm related lines
-    commented_pattern = re.compile(r'^(\s*)#\s*(.*\.webm.*)', re.IGNORECASE)
-    
-    for line in lines:
-        match = commented_pattern.match(line)
-        if match and ('movie_cutscene' in line or 'Video' in line or 'Movie' in line):
-            indent = match.group(1)
-            code = match.group(2)
-            # Strip line ending before adding to avoid duplication
-            code = code.rstrip('\n\r')
-            new_line = f"{indent}{code}\n"
-            new_lines.append(new_line)
-            modified = True
+    if dry_run:
+        # Preview only needs the restored text of each matched line
+        uncommented_count = 0
+        for match in _COMMENTED_PATTERN.finditer(content):
+            print(f"  [Preview] Will restore line: {match.group('code').strip()[:80]}", file=out)
             uncommented_count += 1
-            if dry_run:
-                print(f"  [Preview] Will restore line: {new_line.strip()[:80]}")
-        else:
-            new_lines.append(line)
+        return uncommented_count > 0, False
+    
+    # Rewrite the loaded content directly, no per-line list of strings
+    new_content, uncommented_count = _COMMENTED_PATTERN.subn(_uncomment_line, content)
+    modified = uncommented_count > 0
     
-    if modified and not dry_run:
+    if modified:
         try:
-            with open(rpy_file, 'w', encoding='utf-8') as f:
-                f.writelines(new_lines)
-            print(f"  Restored {uncommented_count} lines of webm related code")
+            write_webm_script(rpy_file, new_content)
+            print(f"  Restored {uncommented_count} lines of webm related code", file=out)
         except Exception as e:
-            print(f"  Error: Cannot write file {rpy_file}: {e}")
+            print(f"  Error: Cannot write file {rpy_file}: {e}", file=out)
             return False, True
     
     return modified, False
 
 
+def _process_one(rpy_file, process_fn, dry_run):
+    """Run process_fn (comment_webm_lines or uncomment_webm_lines) on one .rpy file in a worker
+    Returns: (rpy_file, modified, error, output) - output holds the messages printed while processing
+    """
+    # Collect messages so each file's output stays together when written by the parent
+    output = io.StringIO()
+    modified, error = process_fn(rpy_file, dry_run=dry_run, out=output)
+    return rpy_file, modified, error, output.getvalue()
+
+
+def _scan_one(rpy_file, contains_name):
+    """Find webm references of one .rpy file in a worker thread, returns (rpy_file, refs, output)"""
+    output = io.StringIO()
+    refs = find_webm_references(rpy_file, contains_name, out=output)
+    return rpy_file, refs, output.getvalue()
+
+
+def make_executor(read_only):
+    """Threads for read-only scans/previews (I/O bound, nothing to pickle), processes for rewrites"""
+    cpu_count = os.cpu_count() or 1
+    if read_only:
+        return ThreadPoolExecutor(max_workers=min(32, cpu_count * 4))
+    return ProcessPoolExecutor(max_workers=cpu_count)
+
+
 def delete_webm_files(webm_files, dry_run=False):
-    """Delete webm files"""
+    """Delete webm files (Path or str)"""
     deleted = []
-    for webm_path in webm_files:
+    # Group deletes by directory so each parent's dentries stay hot (sort is stable within a directory)
+    for webm_path in sorted(webm_files, key=os.path.dirname):
         if dry_run:
             print(f"  [Preview] Will delete: {webm_path}")
             deleted.append(webm_path)
         else:
             try:
-                webm_path.unlink()
+                os.unlink(webm_path)
                 print(f"  Deleted: {webm_path}")
                 deleted.append(webm_path)
             except Exception as e:
@@ -221,6 +305,8 @@ Examples:
     args = parser.parse_args()
     
     project_root = get_project_root()
+    # All printed paths are under project_root, so relative paths are a plain string slice
+    root_prefix_len = len(os.path.join(str(project_root), ''))
     print(f"Project root: {project_root}")
     print("=" * 60)
     
@@ -228,30 +314,31 @@ Examples:
     
     # 1. Scan webm files
     print("\n[1/3] Scanning webm files...")
-    webm_files = find_webm_files(project_root)
+    webm_files, rpy_files = scan_game_assets(project_root)
     
     if not webm_files:
         print("  No .webm files found")
     else:
         print(f"  Found {len(webm_files)} .webm file(s):")
-        for f in webm_files:
-            size = f.stat().st_size if f.exists() else 0
-            print(f"    - {f.relative_to(project_root)} ({size/1024/1024:.2f} MB)")
+        for f, size in webm_files:
+            print(f"    - {str(f)[root_prefix_len:]} ({size/1024/1024:.2f} MB)")
     
     if args.scan_only:
         # Scan only mode: also show code references
         print("\n[2/3] Scanning script references...")
-        rpy_files = find_rpy_files(project_root)
-        webm_names = [f.name for f in webm_files]
+        contains_name = build_name_matcher(tuple(f.name for f, _ in webm_files))
         
         found_refs = False
-        for rpy_file in rpy_files:
-            refs = find_webm_references(rpy_file, webm_names)
-            if refs:
+        scan_one = functools.partial(_scan_one, contains_name=contains_name)
+        with make_executor(read_only=True) as executor:
+            for rpy_file, refs, output in executor.map(scan_one, rpy_files):
+                sys.stdout.write(output)
+                if not refs:
+                    continue
                 if not found_refs:
                     print("  Found webm references:")
                     found_refs = True
-                print(f"    File: {rpy_file.relative_to(project_root)}")
+                print(f"    File: {str(rpy_file)[root_prefix_len:]}")
                 for line_num, line, is_movie in refs:
                     prefix = "[movie_cutscene]" if is_movie else ""
                     print(f"      Line {line_num}: {line.strip()[:60]}{prefix}")
@@ -264,30 +351,25 @@ Examples:
     
     # 2. Process script files
     print("\n[2/3] Processing script files...")
-    rpy_files = find_rpy_files(project_root)
     modified_files = []
     
-    for rpy_file in rpy_files:
-        if args.restore:
-            result, error = uncomment_webm_lines(rpy_file, dry_run=args.dry_run)
-            if error:  # Error occurred
-                has_error = True
-            elif result:  # Successfully modified
-                modified_files.append(rpy_file)
-                if args.dry_run:
-                    print(f"  {rpy_file.relative_to(project_root)} (preview)")
-                else:
-                    print(f"  Restored: {rpy_file.relative_to(project_root)}")
-        else:
-            result, error = comment_webm_lines(rpy_file, dry_run=args.dry_run)
+    # Pick the mode once, not per file
+    process_fn = uncomment_webm_lines if args.restore else comment_webm_lines
+    verb = 'Restored' if args.restore else 'Modified'
+    process_one = functools.partial(_process_one, process_fn=process_fn, dry_run=args.dry_run)
+    
+    # Files are independent, process them in parallel (results come back in order)
+    with make_executor(read_only=args.dry_run) as executor:
+        for rpy_file, result, error, output in executor.map(process_one, rpy_files, chunksize=16):
+            sys.stdout.write(output)
             if error:  # Error occurred
                 has_error = True
             elif result:  # Successfully modified
                 modified_files.append(rpy_file)
                 if args.dry_run:
-                    print(f"  {rpy_file.relative_to(project_root)} (preview)")
+                    print(f"  {str(rpy_file)[root_prefix_len:]} (preview)")
                 else:
-                    print(f"  Modified: {rpy_file.relative_to(project_root)}")
+                    print(f"  {verb}: {str(rpy_file)[root_prefix_len:]}")
     
     if not modified_files and not has_error:
         print("  No script files need modification")
@@ -298,10 +380,10 @@ Examples:
         if webm_files:
             if args.dry_run:
                 print("  [Preview] Following files will be deleted:")
-                for f in webm_files:
-                    print(f"    - {f.relative_to(project_root)}")
+                for f, _ in webm_files:
+                    print(f"    - {str(f)[root_prefix_len:]}")
             else:
-                deleted = delete_webm_files(webm_files, dry_run=False)
+                deleted = delete_webm_files([f for f, _ in webm_files], dry_run=False)
                 if len(deleted) != len(webm_files):
                     has_error = True
                 print(f"  Deleted {len(deleted)} file(s)")
@@ -7,14 +7,14 @@ Execute in order:
 2. remove_op.py - Remove WebM video references
 """
 
+import importlib
 import os
 import sys
-import subprocess
 from pathlib import Path
 
 
 def run_script(script_name):
-    """Run specified Python script"""
+    """Run specified Python script's main() in this process"""
     script_dir = Path(__file__).parent
     script_path = script_dir / script_name
     
@@ -26,20 +26,31 @@ def run_script(script_name):
         print(f"Error: Script not found {script_path}")
         return False
     
+    if str(script_dir) not in sys.path:
+        sys.path.insert(0, str(script_dir))
+    
+    # Give the script the argv and working directory (project root) it had as a child process
+    saved_argv, saved_cwd = sys.argv, os.getcwd()
+    sys.argv = [str(script_path)]
+    os.chdir(script_dir.parent)
     try:
-        result = subprocess.run(
-            [sys.executable, str(script_path)],
-            check=True,
-            cwd=script_dir.parent  # Run in project root directory
-        )
-        print(f"✓ {script_name} execution complete")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"✗ {script_name} execution failed (return code: {e.returncode})")
-        return False
+        # Imported as a module rather than __main__, so its process pools can pickle its functions
+        module = importlib.import_module(script_path.stem)
+        returncode = 0 if module.main() is not False else 1
+    except SystemExit as e:
+        returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
     except Exception as e:
         print(f"✗ {script_name} execution error: {e}")
         return False
+    finally:
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+    
+    if returncode != 0:
+        print(f"✗ {script_name} execution failed (return code: {returncode})")
+        return False
+    print(f"✓ {script_name} execution complete")
+    return True
 
 
 def main():
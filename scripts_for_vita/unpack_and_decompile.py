@@ -8,104 +8,88 @@ Features:
 3. Delete residual .rpa files
 """
 
+import functools
+import importlib.util
 import os
+import site
 import sys
-import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Max .rpyc files per unrpyc run, keeps the command line well under the
+# Windows 32K character limit
+RPYC_BATCH_SIZE = 100
+
+# Only the last stderr lines of a failed tool run are kept for the report
+STDERR_TAIL_LINES = 200
+
+# Echo every rpatool/unrpyc command line, enable with VITA_VERBOSE=1 environment variable
+VERBOSE = os.environ.get('VITA_VERBOSE') == '1'
+
+# Resolved once in-process instead of asking a child interpreter every lookup
+# (site modules of old virtualenvs have no getsitepackages, skip the lookup there)
+try:
+    _SITE_PACKAGES = site.getsitepackages()
+except AttributeError:
+    _SITE_PACKAGES = []
+
+
+def _find_in_site_packages(*names):
+    """Return the first existing site-packages file among names, or None"""
+    if not _SITE_PACKAGES:
+        return None
+    site_pkg = Path(_SITE_PACKAGES[0])
+    for path in [site_pkg, site_pkg.parent / "site-packages"]:
+        for name in names:
+            tool_path = path / name
+            if tool_path.exists():
+                return str(tool_path)
+    return None
+
+
+def _rpatool_command_available():
+    """Check if the rpatool command line tool runs"""
+    import subprocess
+    
+    try:
+        result = subprocess.run(["rpatool", "--help"], capture_output=True, timeout=5)
+        return result.returncode == 0
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return False
+
+
+def _probe(checks):
+    """Run checks in order until one passes, returns True if any did"""
+    return any(check() for check in checks)
+
 
 def check_dependencies():
     """Check if required dependencies are installed"""
     missing = []
     base_dir = Path(__file__).parent.parent
-    
-    # Check rpatool - first check local tools folder (rpatool has no .py extension)
-    rpatool_available = False
-    local_rpatool = base_dir / "tools" / "rpatool" / "rpatool"
-    if local_rpatool.exists():
-        rpatool_available = True
-    
-    # Check if the module can be imported
-    if not rpatool_available:
-        try:
-            result = subprocess.run([sys.executable, "-c", "import rpatool"], 
-                                  capture_output=True, timeout=5)
-            if result.returncode == 0:
-                rpatool_available = True
-        except Exception:
-            pass
-    
-    # Also check if command line tool is available
-    if not rpatool_available:
-        try:
-            result = subprocess.run(["rpatool", "--help"], capture_output=True, timeout=5)
-            if result.returncode == 0:
-                rpatool_available = True
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            pass
-    
-    # Try to find rpatool.py directly in site-packages
-    if not rpatool_available:
-        try:
-            result = subprocess.run([sys.executable, "-c", 
-                "import site; print(site.getsitepackages()[0])"], 
-                capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                site_pkg = result.stdout.strip()
-                for path in [Path(site_pkg), Path(site_pkg).parent / "site-packages"]:
-                    rpatool_path = path / "rpatool.py"
-                    if rpatool_path.exists():
-                        rpatool_available = True
-                        break
-        except Exception:
-            pass
-    
+    # Re-checks after auto-install must see freshly installed modules
+    importlib.invalidate_caches()
+    
+    # Check rpatool: local tools folder (no .py extension), importable module,
+    # rpatool.py in site-packages, and last the command line tool (the only probe that spawns)
+    rpatool_available = _probe([
+        lambda: (base_dir / "tools" / "rpatool" / "rpatool").exists(),
+        lambda: importlib.util.find_spec("rpatool") is not None,
+        lambda: _find_in_site_packages("rpatool.py") is not None,
+        _rpatool_command_available,
+    ])
     if not rpatool_available:
         missing.append("rpatool")
     
-    # Check unrpyc - first check local tools folder
-    unrpyc_available = False
-    local_unrpyc = base_dir / "tools" / "unrpyc" / "unrpyc.py"
-    if local_unrpyc.exists():
-        unrpyc_available = True
-    
-    # Try import detection
-    if not unrpyc_available:
-        try:
-            result = subprocess.run([sys.executable, "-c", "import unrpyc"], 
-                                  capture_output=True, timeout=5)
-            if result.returncode == 0:
-                unrpyc_available = True
-        except Exception:
-            pass
-    
-    # Backup detection method - check if unrpyc module exists
-    if not unrpyc_available:
-        try:
-            result = subprocess.run([sys.executable, "-m", "unrpyc", "--help"], 
-                                  capture_output=True, timeout=5)
-            # unrpyc shows help or error without "No module named"
-            if b"No module named" not in result.stderr and b"No module named" not in result.stdout:
-                unrpyc_available = True
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            pass
-    
-    # Try to find unrpyc.py directly in site-packages
-    if not unrpyc_available:
-        try:
-            result = subprocess.run([sys.executable, "-c", 
-                "import site; print(site.getsitepackages()[0])"], 
-                capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                site_pkg = result.stdout.strip()
-                for path in [Path(site_pkg), Path(site_pkg).parent / "site-packages"]:
-                    unrpyc_path = path / "unrpyc.py"
-                    if unrpyc_path.exists():
-                        unrpyc_available = True
-                        break
-        except Exception:
-            pass
-    
+    # Check unrpyc: local tools folder, importable module (also covers -m unrpyc),
+    # unrpyc.py in site-packages
+    unrpyc_available = _probe([
+        lambda: (base_dir / "tools" / "unrpyc" / "unrpyc.py").exists(),
+        lambda: importlib.util.find_spec("unrpyc") is not None,
+        lambda: _find_in_site_packages("unrpyc.py") is not None,
+    ])
     if not unrpyc_available:
         missing.append("unrpyc")
     
@@ -115,6 +99,7 @@ def check_dependencies():
 def install_dependency(dep_name, repo_url):
     """Clone and install dependency from GitHub to project tools folder"""
     import shutil
+    import subprocess
     
     print(f"\n  Installing {dep_name}...")
     
@@ -186,22 +171,25 @@ def auto_install_deps(missing_deps):
     return success, failed
 
 
-def find_rpa_files(game_dir):
-    """Find all .rpa files"""
-    rpa_files = []
-    for file in Path(game_dir).rglob("*.rpa"):
-        rpa_files.append(file)
-    return rpa_files
-
-
-def find_rpyc_files(game_dir):
-    """Find all .rpyc files"""
-    rpyc_files = []
-    for file in Path(game_dir).rglob("*.rpyc"):
-        rpyc_files.append(file)
-    return rpyc_files
-
-
+def find_files_by_suffix(game_dir, suffixes=(".rpa", ".rpyc")):
+    """Find files for every suffix in one os.scandir walk (explicit stack)
+    Returns: {suffix: [Path, ...]}
+    """
+    found = {suffix: [] for suffix in suffixes}
+    stack = [str(game_dir)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                bucket = found.get(os.path.splitext(os.path.normcase(entry.name))[1])
+                if bucket is not None:
+                    bucket.append(Path(entry.path))
+    return found
+
+
+@functools.lru_cache(maxsize=None)
 def find_rpatool_script():
     """Find rpatool script in project tools folder or site-packages"""
     # First check project local tools folder (rpatool has no .py extension)
@@ -210,26 +198,11 @@ def find_rpatool_script():
     if local_rpatool.exists():
         return str(local_rpatool)
     
-    # Then check site-packages
-    try:
-        result = subprocess.run([sys.executable, "-c", 
-            "import site; print(site.getsitepackages()[0])"], 
-            capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            site_pkg = result.stdout.strip()
-            for path in [Path(site_pkg), Path(site_pkg).parent / "site-packages"]:
-                # rpatool may not have .py extension
-                rpatool_path = path / "rpatool"
-                if rpatool_path.exists():
-                    return str(rpatool_path)
-                rpatool_path = path / "rpatool.py"
-                if rpatool_path.exists():
-                    return str(rpatool_path)
-    except Exception:
-        pass
-    return None
+    # Then check site-packages (rpatool may not have .py extension)
+    return _find_in_site_packages("rpatool", "rpatool.py")
 
 
+@functools.lru_cache(maxsize=None)
 def find_unrpyc_script():
     """Find unrpyc.py in project tools folder or site-packages"""
     # First check project local tools folder
@@ -239,37 +212,81 @@ def find_unrpyc_script():
         return str(local_unrpyc)
     
     # Then check site-packages
-    try:
-        result = subprocess.run([sys.executable, "-c", 
-            "import site; print(site.getsitepackages()[0])"], 
-            capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            site_pkg = result.stdout.strip()
-            for path in [Path(site_pkg), Path(site_pkg).parent / "site-packages"]:
-                unrpyc_path = path / "unrpyc.py"
-                if unrpyc_path.exists():
-                    return str(unrpyc_path)
-    except Exception:
-        pass
-    return None
+    return _find_in_site_packages("unrpyc.py")
+
+
+def rpatool_command(use_module=False):
+    """Build the rpatool command prefix, extract_rpa appends the per-archive arguments"""
+    rpatool_script = find_rpatool_script()
+    # Always try local script first
+    if rpatool_script:
+        return [sys.executable, rpatool_script]
+    elif use_module:
+        # Fallback to module mode
+        return [sys.executable, "-m", "rpatool"]
+    else:
+        # Use command line mode
+        return ["rpatool"]
+
+
+def unrpyc_command():
+    """Build the unrpyc command prefix, decompile_rpyc_batch appends the files"""
+    unrpyc_script = find_unrpyc_script()
+    # Try to find unrpyc.py directly first
+    if unrpyc_script:
+        return [sys.executable, unrpyc_script]
+    else:
+        # Fallback to module mode
+        return [sys.executable, "-m", "unrpyc"]
 
 
-def extract_rpa(rpa_file, output_dir, use_module=False):
-    """Unpack .rpa file using rpatool"""
+def run_tool(cmd, timeout, keep=None):
+    """Run a tool keeping only the stderr tail in memory, stdout is discarded
+    keep: if given, stdout is merged into stderr and every line containing keep
+    (case-insensitive) is collected in full, tail or not
+    Returns: CompletedProcess with stderr as text and the kept lines as stdout,
+    raises TimeoutExpired like subprocess.run
+    """
+    import subprocess
+    
+    if keep:
+        pipes = {'stdout': subprocess.PIPE, 'stderr': subprocess.STDOUT}
+    else:
+        pipes = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.PIPE}
+    with subprocess.Popen(cmd, text=True, **pipes) as proc:
+        # stderr is read line by line below, so a timer kills the tool if it hangs
+        timed_out = threading.Event()
+        
+        def kill():
+            timed_out.set()
+            proc.kill()
+        
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            tail = deque(maxlen=STDERR_TAIL_LINES)
+            kept = []
+            for line in (proc.stdout if keep else proc.stderr):
+                tail.append(line)
+                if keep and keep in line.lower():
+                    kept.append(line)
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout, stderr=''.join(tail))
+    return subprocess.CompletedProcess(cmd, returncode, ''.join(kept), ''.join(tail))
+
+
+def extract_rpa(rpa_file, output_dir, cmd_prefix):
+    """Unpack .rpa file using rpatool (cmd_prefix from rpatool_command)"""
     try:
-        # Always try local script first
-        rpatool_script = find_rpatool_script()
-        if rpatool_script:
-            cmd = [sys.executable, rpatool_script, "-x", str(rpa_file), "-o", str(output_dir)]
-        elif use_module:
-            # Fallback to module mode
-            cmd = [sys.executable, "-m", "rpatool", "-x", str(rpa_file), "-o", str(output_dir)]
-        else:
-            # Use command line mode
-            cmd = ["rpatool", "-x", str(rpa_file), "-o", str(output_dir)]
+        cmd = cmd_prefix + ["-x", str(rpa_file), "-o", str(output_dir)]
         
-        print(f"  Executing: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        if VERBOSE:
+            print(f"  Executing: {' '.join(cmd)}")
+        # Only stderr is reported, progress output on stdout is discarded
+        result = run_tool(cmd, timeout=300)
         if result.returncode == 0:
             print(f"  ✓ Successfully unpacked: {rpa_file.name}")
             return True
@@ -281,62 +298,88 @@ def extract_rpa(rpa_file, output_dir, use_module=False):
         return False
 
 
-def decompile_rpyc(rpyc_file, output_dir=None):
-    """Decompile .rpyc file using unrpyc"""
+def decompile_rpyc_batch(rpyc_files, cmd_prefix, output_dir=None):
+    """Decompile .rpyc files with a single unrpyc run (cmd_prefix from unrpyc_command)
+    Returns: list of per-file success flags
+    """
+    # unrpyc writes name.rpy next to name.rpyc (or into output_dir), outputs tell per-file results
+    rpy_files = [(Path(output_dir) if output_dir else rpyc_file.parent) / (rpyc_file.stem + '.rpy')
+                 for rpyc_file in rpyc_files]
+    existed = [rpy_file.exists() for rpy_file in rpy_files]
     try:
-        # Try to find unrpyc.py directly first
-        unrpyc_script = find_unrpyc_script()
-        if unrpyc_script:
-            cmd = [sys.executable, unrpyc_script, str(rpyc_file)]
-        else:
-            # Fallback to module mode
-            cmd = [sys.executable, "-m", "unrpyc", str(rpyc_file)]
+        cmd = cmd_prefix + [str(rpyc_file) for rpyc_file in rpyc_files]
         
         # If output directory specified
         if output_dir:
             cmd.extend(["-o", str(output_dir)])
         
-        print(f"  Executing: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        if result.returncode == 0:
-            print(f"  ✓ Successfully decompiled: {rpyc_file.name}")
-            return True
-        else:
-            if "already exists" in result.stderr.lower() or "already exists" in result.stdout.lower():
-                print(f"  ⚠ File already exists, skipping: {rpyc_file.name}")
-                return True
-            print(f"  ✗ Decompile failed: {result.stderr}")
-            return False
+        if VERBOSE:
+            print(f"  Executing: {' '.join(cmd)}")
+        # Per-file results come from the .rpy outputs, only the skip notices of stdout are kept
+        result = run_tool(cmd, timeout=60 * len(rpyc_files), keep='already exists')
     except Exception as e:
         print(f"  ✗ Decompile error: {e}")
-        return False
+        return [False] * len(rpyc_files)
+    
+    if result.returncode == 0:
+        for rpyc_file in rpyc_files:
+            print(f"  ✓ Successfully decompiled: {rpyc_file.name}")
+        return [True] * len(rpyc_files)
+    
+    # Some files failed, the ones that have a new .rpy made it, an old .rpy
+    # only counts when unrpyc said it skipped that file
+    skipped = result.stdout.splitlines()
+    results = []
+    for rpyc_file, rpy_file, rpy_existed in zip(rpyc_files, rpy_files, existed):
+        if rpy_existed:
+            ok = any(rpy_file.name in line or rpyc_file.name in line for line in skipped)
+            if ok:
+                print(f"  ⚠ File already exists, skipping: {rpyc_file.name}")
+        else:
+            ok = rpy_file.exists()
+            if ok:
+                print(f"  ✓ Successfully decompiled: {rpyc_file.name}")
+        if not ok:
+            print(f"  ✗ Decompile failed: {rpyc_file.name}")
+        results.append(ok)
+    if result.stderr:
+        print(f"  unrpyc output: {result.stderr}")
+    return results
+
+
+def _safe_unlink(path):
+    """Delete path, returns (path, ok, error)"""
+    # Already gone counts as deleted, like unlink(missing_ok=True) which needs Python 3.8
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        return path, False, e
+    return path, True, None
 
 
-def delete_rpa_files(rpa_files):
-    """Delete .rpa files"""
+def _delete_files(files):
+    """Delete files in parallel threads (unlink waits on the filesystem), reports in input order"""
     deleted = []
-    for rpa_file in rpa_files:
-        try:
-            os.remove(rpa_file)
-            deleted.append(rpa_file.name)
-            print(f"  ✓ Deleted: {rpa_file.name}")
-        except Exception as e:
-            print(f"  ✗ Delete failed {rpa_file.name}: {e}")
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        for path, ok, error in executor.map(_safe_unlink, files):
+            if ok:
+                deleted.append(path.name)
+                print(f"  ✓ Deleted: {path.name}")
+            else:
+                print(f"  ✗ Delete failed {path.name}: {error}")
     return deleted
 
 
+def delete_rpa_files(rpa_files):
+    """Delete .rpa files"""
+    return _delete_files(rpa_files)
+
+
 def delete_rpyc_files(rpyc_files):
     """Delete .rpyc files"""
-    deleted = []
-    for rpyc_file in rpyc_files:
-        try:
-            os.remove(rpyc_file)
-            deleted.append(rpyc_file.name)
-            print(f"  ✓ Deleted: {rpyc_file.name}")
-        except Exception as e:
-            print(f"  ✗ Delete failed {rpyc_file.name}: {e}")
-    return deleted
+    return _delete_files(rpyc_files)
 
 
 def main():
@@ -419,17 +462,30 @@ def main():
     print("Step 1/4: Find and unpack .rpa files")
     print("-" * 40)
     
-    rpa_files = find_rpa_files(game_dir)
+    # One walk buckets both file types, steps below reuse it
+    found = find_files_by_suffix(game_dir)
+    rpa_files = found[".rpa"]
     
     if not rpa_files:
         print("  No .rpa files found, skipping this step")
     else:
         print(f"  Found {len(rpa_files)} .rpa file(s)")
         
+        # Unpack one archive at a time, they all extract into game/ and a later
+        # archive must deterministically overwrite files shared with an earlier one
+        rpatool_cmd = rpatool_command(use_module=not rpatool_available)
+        unpacked_count = 0
         for rpa_file in rpa_files:
             print(f"\n  Unpacking: {rpa_file.name}")
-            if not extract_rpa(rpa_file, game_dir, use_module=not rpatool_available):
+            if extract_rpa(rpa_file, game_dir, rpatool_cmd):
+                unpacked_count += 1
+            else:
                 has_error = True
+        
+        # Unpacking writes new .rpyc (and possibly nested .rpa) files, walk once more,
+        # the first walk still holds when no archive unpacked
+        if unpacked_count:
+            found = find_files_by_suffix(game_dir)
     
     print()
     
@@ -437,19 +493,23 @@ def main():
     print("Step 2/4: Decompile .rpyc files")
     print("-" * 40)
     
-    rpyc_files = find_rpyc_files(game_dir)
+    rpyc_files = found[".rpyc"]
     
     if not rpyc_files:
         print("  No .rpyc files found, skipping this step")
     else:
         print(f"  Found {len(rpyc_files)} .rpyc file(s)")
         
+        # One unrpyc run per batch amortizes interpreter startup, batches run one at a
+        # time since unrpyc already decompiles a batch with its own pool of cpu_count workers
+        unrpyc_cmd = unrpyc_command()
         success_count = 0
-        for rpyc_file in rpyc_files:
-            print(f"\n  Decompiling: {rpyc_file.name}")
-            if decompile_rpyc(rpyc_file):
-                success_count += 1
-            else:
+        for i in range(0, len(rpyc_files), RPYC_BATCH_SIZE):
+            batch = rpyc_files[i:i + RPYC_BATCH_SIZE]
+            print(f"\n  Decompiling {len(batch)} file(s): {batch[0].name} ...")
+            results = decompile_rpyc_batch(batch, unrpyc_cmd)
+            success_count += sum(results)
+            if not all(results):
                 has_error = True
         
         print(f"\n  Decompile complete: {success_count}/{len(rpyc_files)} successful")
@@ -460,8 +520,8 @@ def main():
     print("Step 3/4: Delete residual .rpa files")
     print("-" * 40)
 
-    # Re-find .rpa files (new ones may have been created during unpacking)
-    rpa_files = find_rpa_files(game_dir)
+    # Includes archives unpacked from other archives, decompiling creates no new ones
+    rpa_files = found[".rpa"]
 
     if not rpa_files:
         print("  No residual .rpa files")
@@ -478,8 +538,8 @@ def main():
     print("Step 4/4: Delete decompiled .rpyc files")
     print("-" * 40)
 
-    # Re-find .rpyc files
-    rpyc_files = find_rpyc_files(game_dir)
+    # Decompiling only writes .rpy files, so the walk after unpacking is still current
+    rpyc_files = found[".rpyc"]
 
     if not rpyc_files:
         print("  No residual .rpyc files")